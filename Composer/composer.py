@@ -4,6 +4,7 @@ from .platform_configuration import PlatformConfiguration, TaskDefinition
 from importlib import import_module
 from Helper import Log
 from typing import List, Dict, Optional, Tuple
+from threading import Lock
 from Executor.Tasks.Run import Message
 from Interfaces import Management
 
@@ -11,6 +12,12 @@ from Interfaces import Management
 class Composer:
     facility: Facility = None
 
+    # Run tasks, requirements and panels generated for each combination of UEs and test cases, reused while the
+    # facility is not reloaded. Task definitions are not modified during the executions, so they can be shared.
+    compositionLock = Lock()
+    compositions: Dict[Tuple, Tuple[List[TaskDefinition], List[str], List[DashboardPanel]]] = {}
+    compositionsVersion = -1
+
     @staticmethod
     def getMessageAction(severity: str, message: str) -> ActionInformation:
         action = ActionInformation()
@@ -35,18 +42,15 @@ class Composer:
         configuration.RunParams['Report'] = {'ExperimentName': descriptor.Identifier}
 
         actions: List[ActionInformation] = []
-        panels: List[DashboardPanel] = []
         errored = False
 
         if descriptor.Slice is not None:
             if len(descriptor.NetworkServices) != 0:
-                sliceManager = Management.SliceManager()
-                nameToLocation = sliceManager.GetVimNameToLocationMapping()
                 for ns in descriptor.NetworkServices:
                     nsId, vimName = ns
                     try:
-                        nsdName, nsdId, nsdRequirements = sliceManager.GetNsdData(nsId)
-                        location = nameToLocation.get(vimName, None)
+                        nsdName, nsdId, nsdRequirements = Management.GetNsdData(nsId)
+                        location = Management.GetVimLocation(vimName)
                         if nsdRequirements is None:
                             raise RuntimeError(f"Could not retrieve NSD information for '{nsId}'")
                         elif location is None:
@@ -69,38 +73,71 @@ class Composer:
                         "ERROR", f'Error while generating NEST data for experiment: {error}'))
 
         if not errored:
-            if descriptor.Type == ExperimentType.MONROE:
-                actions.extend(cls.facility.GetMonroeActions())
+            runTasks, requirements, panels = cls.composeActions(descriptor)
+        else:
+            runTasks, requirements = cls.getRunTasks(actions)
+            panels = []
+
+        configuration.RunTasks = list(runTasks)
+        configuration.Requirements = list(requirements)
+        configuration.DashboardPanels = list(panels)
+
+        return configuration
+
+    @classmethod
+    def composeActions(cls, descriptor: ExperimentDescriptor) \
+            -> Tuple[List[TaskDefinition], List[str], List[DashboardPanel]]:
+        """Returns the run tasks, requirements and panels generated by the facility for the experiment (memoized)"""
+        key = (descriptor.Type, descriptor.Automated, tuple(descriptor.UEs), tuple(descriptor.TestCases),
+               None if descriptor.Automated else descriptor.Duration)
+
+        with cls.compositionLock:
+            if cls.compositionsVersion != Facility.Version:
+                cls.compositions.clear()
+                cls.compositionsVersion = Facility.Version
+            composition = cls.compositions.get(key, None)
+        if composition is not None:
+            return composition
+
+        actions: List[ActionInformation] = []
+        panels: List[DashboardPanel] = []
+        if descriptor.Type == ExperimentType.MONROE:
+            actions.extend(cls.facility.GetMonroeActions())
+        else:
+            if descriptor.Automated:
+                for ue in descriptor.UEs:
+                    actions.extend(cls.facility.GetUEActions(ue))
+                for testcase in descriptor.TestCases:
+                    testcaseActions = cls.facility.GetTestCaseActions(testcase)
+                    if len(testcaseActions) != 0:
+                        actions.extend(testcaseActions)
+                    else:
+                        actions.append(cls.getMessageAction(  # Notify, but do not cancel execution
+                            "WARNING", f'TestCase "{testcase}" did not generate any actions'))
+                    panels.extend(cls.facility.GetTestCaseDashboards(testcase))
             else:
-                if descriptor.Automated:
-                    for ue in descriptor.UEs:
-                        actions.extend(cls.facility.GetUEActions(ue))
-                    for testcase in descriptor.TestCases:
-                        testcaseActions = cls.facility.GetTestCaseActions(testcase)
-                        if len(testcaseActions) != 0:
-                            actions.extend(testcaseActions)
-                        else:
-                            actions.append(cls.getMessageAction(  # Notify, but do not cancel execution
-                                "WARNING", f'TestCase "{testcase}" did not generate any actions'))
-                        panels.extend(cls.facility.GetTestCaseDashboards(testcase))
-                else:
-                    delay = ActionInformation()
-                    delay.TaskName = "Run.Delay"
-                    delay.Config = {'Time': descriptor.Duration*60}
-                    actions.append(delay)
+                delay = ActionInformation()
+                delay.TaskName = "Run.Delay"
+                delay.Config = {'Time': descriptor.Duration*60}
+                actions.append(delay)
+
+        runTasks, requirements = cls.getRunTasks(actions)
+        composition = (runTasks, requirements, panels)
+        with cls.compositionLock:
+            cls.compositions[key] = composition
+        return composition
 
+    @classmethod
+    def getRunTasks(cls, actions: List[ActionInformation]) -> Tuple[List[TaskDefinition], List[str]]:
         actions.sort(key=lambda action: action.Order)  # Sort by Order (only those at first level)
         requirements = set()
+        runTasks = []
 
         for action in actions:
             requirements.update(action.Requirements)
-            taskDefinition = cls.getTaskDefinition(action)
-            configuration.RunTasks.append(taskDefinition)
-
-        configuration.Requirements = list(requirements)
-        configuration.DashboardPanels = panels
+            runTasks.append(cls.getTaskDefinition(action))
 
-        return configuration
+        return runTasks, list(requirements)
 
     @staticmethod
     def getTaskClass(taskName: str):
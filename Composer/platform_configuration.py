@@ -6,10 +6,28 @@ from Data import NsInfo
 class TaskDefinition:
     def __init__(self):
         self.Task: ClassVar = None
-        self.Params: Dict = {}
+        self.params: Dict = {}
+        self.template = None
         self.Label: str = ''
         self.Children: List[TaskDefinition] = []
 
+    @property
+    def Params(self) -> Dict:
+        return self.params
+
+    @Params.setter
+    def Params(self, value: Dict):
+        self.params = value
+        self.template = None
+
+    @property
+    def Template(self) -> 'Template':
+        """Params compiled for expansion, generated only once per task definition"""
+        if self.template is None:
+            from Experiment import Template  # Delayed to avoid cyclic imports
+            self.template = Template(self.params)
+        return self.template
+
     def GetTaskInstance(self, logMethod, parent, params):
         taskInstance = self.Task(logMethod, parent, params)
         taskInstance.Label = self.Label
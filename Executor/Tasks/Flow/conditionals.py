@@ -67,6 +67,10 @@ class While(ConditionalSequenceBase):
         goOn = True
         iteration = 0
         while goOn:
+            if self.StopRequested:
+                self.Log(Level.INFO, f"Execution cancelled. While loop finalized.")
+                break
+
             if maxIterations is None or iteration < maxIterations:
                 if evaluate is not None:
                     try:
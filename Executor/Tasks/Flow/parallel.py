@@ -1,53 +1,107 @@
 from Task import Task
 from Helper import Level
-from threading import Thread
 from Composer import TaskDefinition
 from Experiment import Expander
 from Executor import Verdict
+from collections import deque
+from os import cpu_count
+from threading import Lock, Thread
+from time import monotonic
+from typing import List, Optional
 
 
 class ChildInfo:
-    def __init__(self, definition: TaskDefinition):
-        self.Thread = None
+    def __init__(self, index: int, definition: TaskDefinition):
+        self.Index = index
         self.TaskDefinition = definition
         self.TaskInstance = None
+        self.Started: Optional[float] = None
+        self.Finished: Optional[float] = None
+        self.Skipped = False
 
 
 class Parallel(Task):
+    # Branches are usually waiting on external tools, so allow more of them than CPUs (same as ThreadPoolExecutor)
+    DEFAULT_MAX_WORKERS = min(32, (cpu_count() or 1) + 4)
+
     def __init__(self, logMethod, parent, params):
         super().__init__("Parallel", parent, params, logMethod, None)
+        self.paramRules = {'MaxWorkers': (None, False)}
+        self.pendingLock = Lock()
+        self.pending = deque()
+
+    def inDepthSanitizeParams(self):
+        maxWorkers = self.params['MaxWorkers']
+        if maxWorkers is not None and (not isinstance(maxWorkers, int) or isinstance(maxWorkers, bool) or maxWorkers < 0):
+            self.Log(Level.ERROR, f"MaxWorkers must be a positive integer (or 0 for no limit), got '{maxWorkers}'")
+            return False
+        return True
 
     def Run(self):
         if len(self.Children) == 0:
             self.Log(Level.WARNING, f"Skipping parallel execution: no children defined.")
             return
 
-        self.Log(Level.INFO, f"Starting parallel execution ({len(self.Children)} children)")
-
-        children: [ChildInfo] = []
+        maxWorkers = self.params['MaxWorkers']
+        if maxWorkers is None:
+            maxWorkers = self.DEFAULT_MAX_WORKERS
+            if len(self.Children) > maxWorkers:
+                self.Log(Level.WARNING, f"Only {maxWorkers} of {len(self.Children)} branches will run at the same time, "
+                                        f"set 'MaxWorkers' to 0 if all of them must be started at once")
+        workers = min(maxWorkers or len(self.Children), len(self.Children))
+        self.Log(Level.INFO, f"Starting parallel execution ({len(self.Children)} children, {workers} at a time)")
 
+        children: List[ChildInfo] = []
         for index, child in enumerate(self.Children, start=1):
             if child.Label is None:
                 child.Label = f"Br{index}"
 
             flowState = {'Branch': index}
-            info = ChildInfo(child)
+            info = ChildInfo(index, child)
             info.TaskInstance = child.GetTaskInstance(
-                self.Log, self.parent, Expander.ExpandDict(child.Params, self.parent, flowState))
-            info.Thread = Thread(target=self.runChild, args=(info.TaskInstance,))
+                self.Log, self.parent, Expander.Render(child.Template, self.parent, flowState))
             children.append(info)
 
-            info.Thread.start()
-            self.Log(Level.DEBUG, f"Started branch {index}: {child.Label}")
+        self.pending.extend(children)
+        queued = monotonic()
+        # Each lane is a dedicated thread that runs branches in order until none are left. With 'MaxWorkers: 0' there
+        # is one lane per branch, so that all branches run at the same time.
+        lanes = [Thread(target=self.runLane, name=f'{self.Label}Lane{index}')
+                 for index in range(1, workers + 1)]
+        for lane in lanes:
+            lane.start()
+        for lane in lanes:
+            lane.join()
 
-        for index, info in enumerate(children, start=1):
-            info.Thread.join()
-            self.parent.params.update(info.TaskInstance.Vault)  # Propagate any published values
-            self.Log(Level.DEBUG, f"Branch {index} ({info.TaskDefinition.Label}) joined")
+        for info in children:  # Merge in branch order, regardless of the order in which they finished
+            info.TaskInstance.LogMessages.Close()  # Only the log of top-level tasks is kept for the next one
+            label = info.TaskDefinition.Label
+            if info.Skipped:
+                self.Log(Level.INFO, f"Branch {info.Index} ({label}) skipped: stop requested")
+                continue
+            info.TaskInstance.PropagateValues()
+            self.Log(Level.INFO, f"Branch {info.Index} ({label}) finished in {info.Finished - info.Started:.3f}s "
+                                 f"(waited {info.Started - queued:.3f}s, verdict: '{info.TaskInstance.Verdict.name}')")
             self.Verdict = Verdict.Max(self.Verdict, info.TaskInstance.Verdict)
 
         self.Log(Level.INFO, f"Finished execution of all child tasks")
 
+    def runLane(self):
+        while True:
+            with self.pendingLock:
+                if len(self.pending) == 0:
+                    return
+                info: ChildInfo = self.pending.popleft()
+
+            if self.parent.stopRequested:
+                info.Skipped = True
+                continue
+
+            self.Log(Level.DEBUG, f"Started branch {info.Index}: {info.TaskDefinition.Label}")
+            info.Started = monotonic()
+            self.runChild(info.TaskInstance)
+            info.Finished = monotonic()
+
     def runChild(self, taskInstance: Task):
         try:
             taskInstance.Start()
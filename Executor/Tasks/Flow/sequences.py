@@ -24,15 +24,21 @@ class SequenceBase(Task):
         raise NotImplementedError
 
     def runOne(self, child: TaskDefinition, labelPrefix: str, flowState: Dict):
+        if self.StopRequested:
+            self.Log(Level.DEBUG, f"Skipping {labelPrefix}: execution cancelled")
+            return
+
         taskInstance = child.GetTaskInstance(
-            self.Log, self.parent, Expander.ExpandDict(child.Params, self.parent, flowState))
+            self.Log, self.parent, Expander.Render(child.Template, self.parent, flowState))
         taskInstance.Label = f'{labelPrefix}.{taskInstance.Label}' if taskInstance.Label is not None else labelPrefix
         try:
             taskInstance.Start()
-            self.parent.params.update(taskInstance.Vault)  # Propagate any published values
+            taskInstance.PropagateValues()
         except Exception as e:
             taskInstance.Verdict = Verdict.Error
             self.Log(Level.ERROR, str(e))
+        finally:
+            taskInstance.LogMessages.Close()  # Only the log of top-level tasks is kept for the next one
 
         self.Verdict = Verdict.Max(self.Verdict, taskInstance.Verdict)
 
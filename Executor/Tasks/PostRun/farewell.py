@@ -1,7 +1,6 @@
 from Task import Task
 from Helper import Level
 from Settings import Config
-from time import sleep
 from Interfaces import RemoteApi
 
 
@@ -29,7 +28,7 @@ class Farewell(Task):
                         self.Log(Level.WARNING, f"Could not retrieve status from remote side (Retries: {retries})")
                         status = ExperimentStatus.Init
                         retries -= 1
-                        sleep(5)
+                        self.Wait(5)
 
                 if status.value >= ExperimentStatus.PostRun.value:
                     self.Log(Level.INFO, f"Remote side finished Run stage with status {status.name}")
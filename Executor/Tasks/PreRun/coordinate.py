@@ -1,7 +1,6 @@
 from Task import Task
 from Helper import Level
 from Settings import Config
-from time import sleep
 from Interfaces import RemoteApi
 
 
@@ -24,10 +23,12 @@ class Coordinate(Task):
                     while self.parent.RemoteId is None:
                         if timeout < 0: break
                         self.Log(Level.DEBUG, f'Unavailable. Timeout in {timeout} seconds.')
-                        sleep(5)
+                        if self.Wait(5): break
                         timeout -= 5
 
-                    if self.parent.RemoteId is not None:
+                    if self.StopRequested:
+                        self.Log(Level.INFO, 'Execution cancelled while waiting for remote Execution ID.')
+                    elif self.parent.RemoteId is not None:
                         self.Log(Level.INFO, 'Remote Execution ID received.')
                     else:
                         raise RuntimeError("Timeout reached while waiting for remote Execution ID.")
@@ -1,6 +1,5 @@
 from .base_remote_task import BaseRemoteTask
 from Helper import Level
-from time import sleep
 
 
 class GetValue(BaseRemoteTask):
@@ -25,7 +24,9 @@ class GetValue(BaseRemoteTask):
                 if self.timeout <= 0:
                     self.SetVerdictOnError()
                     raise RuntimeError(f"Timeout reached while waiting for remote remote value '{valueName}'.")
-                sleep(5)
+                if self.Wait(5):
+                    self.Log(Level.INFO, f"Execution cancelled while waiting for remote value '{valueName}'.")
+                    return
                 self.timeout -= 5
 
         self.Log(Level.INFO, f"Value received ({valueName}={value}).")
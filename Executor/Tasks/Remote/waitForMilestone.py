@@ -1,6 +1,5 @@
 from .base_remote_task import BaseRemoteTask
 from Helper import Level
-from time import sleep
 from Executor import ExecutorStatus
 
 
@@ -31,7 +30,9 @@ class WaitForMilestone(BaseRemoteTask):
                 if self.timeout <= 0:
                     self.SetVerdictOnError()
                     raise RuntimeError(f"Timeout reached while waiting for milestone '{milestone}'.")
-                sleep(5)
+                if self.Wait(5):
+                    self.Log(Level.INFO, f"Execution cancelled while waiting for milestone '{milestone}'.")
+                    return
                 self.timeout -= 5
 
         self.Log(Level.INFO, f"Remote side reached milestone '{milestone}'.")
@@ -1,6 +1,5 @@
 from Task import Task
 from Helper import Level
-from time import sleep
 
 
 class CsvToInflux(Task):
@@ -12,7 +11,8 @@ class CsvToInflux(Task):
             'Measurement': (None, True),
             'Delimiter': (',', False),
             'Timestamp': ('Timestamp', False),
-            'Convert': (True, False)
+            'Convert': (True, False),
+            'BatchSize': (10000, False)
         }
 
     def Run(self):
@@ -22,24 +22,46 @@ class CsvToInflux(Task):
         delimiter = self.params["Delimiter"]
         timestamp = self.params["Timestamp"]
         tryConvert = self.params["Convert"]
+        batchSize = self.params["BatchSize"]
 
         try:
-            from Helper import InfluxDb, InfluxPayload  # Delayed to avoid cyclic imports
-            self.Log(Level.INFO, "Converting csv file to payload")
+            batchSize = int(batchSize)
+            if batchSize <= 0: raise ValueError
+        except (TypeError, ValueError):
+            self.Log(Level.ERROR, f"{batchSize} is not a valid batch size")
+            self.SetVerdictOnError()
+            return
+
+        from Helper import InfluxDb  # Delayed to avoid cyclic imports
+        try:
             keysToRemove = ['ExecutionId', *InfluxDb.BaseTags()]
             self.Log(Level.DEBUG, f"The following columns will be replaced (as tags): {keysToRemove}")
-            payload = InfluxDb.CsvToPayload(measurement, csvFile, delimiter, timestamp,
-                                            tryConvert=tryConvert, keysToRemove=keysToRemove)
-            payload.Tags = {'ExecutionId': str(executionId)}
-            self.Log(Level.DEBUG, f"Payload: {payload}")
+            batches = InfluxDb.CsvToPayloads(measurement, csvFile, delimiter, timestamp,
+                                             tryConvert=tryConvert, keysToRemove=keysToRemove, batchSize=batchSize)
         except Exception as e:
             self.Log(Level.ERROR, f"Exception while converting CSV: {e}")
             self.SetVerdictOnError()
             return
 
-        try:
-            self.Log(Level.INFO, "Sending payload to InfluxDb")
-            InfluxDb.Send(payload)
-        except Exception as e:
-            self.Log(Level.ERROR, f"Exception while sending CSV values to Influx: {e}")
-            self.SetVerdictOnError()
+        self.Log(Level.INFO, f"Sending csv file contents to InfluxDb (batches of {batchSize} points)")
+        total = 0
+        while True:
+            try:
+                payload = next(batches, None)
+                if payload is None: break
+                payload.Tags = {'ExecutionId': str(executionId)}
+            except Exception as e:
+                self.Log(Level.ERROR, f"Exception while converting CSV (after {total} points): {e}")
+                self.SetVerdictOnError()
+                return
+
+            try:
+                InfluxDb.SendAsync(payload)
+                total += len(payload.Points)
+                self.Log(Level.INFO, f"Queued {total} points")
+            except Exception as e:
+                self.Log(Level.ERROR, f"Exception while sending CSV values to Influx (after {total} points): {e}")
+                self.SetVerdictOnError()
+                return
+
+        self.Log(Level.INFO, f"Queued {total} points for InfluxDb")
@@ -1,6 +1,5 @@
 from Task import Task
 from Helper import Level
-from time import sleep
 
 
 class Delay(Task):
@@ -20,4 +19,5 @@ class Delay(Task):
             return
 
         self.Log(Level.INFO, f'Waiting for {time} seconds')
-        sleep(time)
+        if self.Wait(time):
+            self.Log(Level.INFO, 'Wait interrupted: execution cancelled')
@@ -7,6 +7,6 @@ class Publish(Task):
 
     def Run(self):
         for key, value in self.params.items():
-            if key in ["VerdictOnError"]:
+            if key in ["VerdictOnError", "Profile", "LogCapture"]:
                 continue  # Keys common to all tasks are ignored
             self.Publish(key, value)
@@ -52,7 +52,7 @@ class RobotFramework(Task):
 
         try:
             self.Log(Level.INFO, "Executing Robot Framework tests")
-            cli = Cli(parameters, self.params['CWD'], self.Log)
+            cli = Cli(parameters, self.params['CWD'], self.Log, self.parent.Cancellation)
             cli.Execute()
             self.Log(Level.INFO, "Robot Framework tests finished")
         except Exception as e:
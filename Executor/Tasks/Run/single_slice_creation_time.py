@@ -1,7 +1,6 @@
 from Task import Task
 from Interfaces import Management
 from Helper import Level
-from time import sleep
 from datetime import datetime
 
 
@@ -29,7 +28,7 @@ class SingleSliceCreationTime(Task):
                 status = Management.SliceManager().CheckSlice(sliceId).get('status', '<SliceManager check error>')
                 self.Log(Level.DEBUG, f'Slice {sliceId} status: {status} (retry {count})')
                 if status == 'Running' or (timeout is not None and count >= timeout): break
-                else: sleep(1)
+                elif self.Wait(1): break
 
         self.Log(Level.INFO, f"Reading deployment times for slice {sliceId}")
         times = Management.SliceManager().SliceCreationTime(sliceId)
@@ -53,8 +52,8 @@ class SingleSliceCreationTime(Task):
         payload.Points.append(point)
         self.Log(Level.DEBUG, f"Payload: {payload}")
         self.Log(Level.INFO, f"Sending results to InfluxDb")
-        InfluxDb.Send(payload)
+        InfluxDb.SendAsync(payload)
 
         # TODO: Artificial wait until the slice is 'configured'
         # TODO: In the future the slice manager should also report this status
-        sleep(60)
+        self.Wait(60)
@@ -1,7 +1,6 @@
 from Task import Task
 from Interfaces import Management
 from Helper import Level
-from time import sleep
 from datetime import datetime, timezone
 from os.path import join
 import json
@@ -44,6 +43,10 @@ class SliceCreationTime(Task):
         nestData = json.dumps(nestData)
 
         for iteration in range(iterations):
+            if self.StopRequested:
+                self.Log(Level.INFO, f"Execution cancelled, skipping remaining iterations")
+                break
+
             self.Log(Level.INFO, f"Instantiating NEST file (iteration {iteration})")
             try:
                 response, success = sliceManager.CreateSlice(nestData)
@@ -53,13 +56,15 @@ class SliceCreationTime(Task):
             except Exception as e:
                 self.Log(Level.ERROR, f"Exception on instantiation, skipping iteration: {e}")
                 self.SetVerdictOnError()
-                sleep(pollTime)
+                self.Wait(pollTime)
                 continue
 
             self.Log(Level.INFO, f"Slice ID: {sliceId}. Waiting for 'Running' status")
             totalWait = 0
             while True:
-                sleep(pollTime)
+                if self.Wait(pollTime):
+                    self.Log(Level.INFO, f"Execution cancelled, skipping iteration")
+                    break
                 totalWait += pollTime
                 sliceInfo = {}
                 status = '<SliceManager check error>'
@@ -103,7 +108,9 @@ class SliceCreationTime(Task):
                 sliceManager.DeleteSlice(sliceId)
                 totalWait = 0
                 while True:
-                    sleep(pollTime)
+                    if self.Wait(pollTime):
+                        self.Log(Level.INFO, f"Execution cancelled, not waiting for slice deletion")
+                        break
                     totalWait += pollTime
                     info = sliceManager.CheckSlice(sliceId)
                     if info is None:
@@ -121,7 +128,7 @@ class SliceCreationTime(Task):
         self.Log(Level.DEBUG, f"Payload: {payload}")
         self.Log(Level.INFO, f"Sending results to InfluxDb")
         try:
-            InfluxDb.Send(payload)
+            InfluxDb.SendAsync(payload)
         except Exception as e:
             self.Log(Level.ERROR, f"Exception while sending payload: {e}")
             self.SetVerdictOnError()
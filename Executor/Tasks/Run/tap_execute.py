@@ -26,7 +26,7 @@ class TapExecute(Task):
             externals = self.params['Externals']
             gatherResults = self.params['GatherResults']
 
-            tap = Tap(tapPlan, externals, self.Log)
+            tap = Tap(tapPlan, externals, self.Log, self.parent.Cancellation)
             tap.Execute()
 
             if gatherResults:
@@ -1,7 +1,7 @@
 from Helper import Level
-from typing import Dict
+from typing import Dict, Optional
 from .executor_base import ExecutorBase
-from Task import Task
+from Task import Task, LogCapture
 from .enums import Status, Verdict
 from tempfile import TemporaryDirectory
 from math import floor
@@ -18,6 +18,7 @@ class Executor(ExecutorBase):
 
         tasks = self.Configuration.RunTasks
         self.params['PreviousTaskLog'] = []
+        previousLog: Optional[LogCapture] = None
         self.Verdict = Verdict.NotSet
         for i, task in enumerate(tasks, start=1):
             if self.stopRequested:
@@ -25,7 +26,7 @@ class Executor(ExecutorBase):
                 self.Status = Status.Cancelled
                 self.Verdict = Verdict.Cancel
                 break
-            taskInstance: Task = task.GetTaskInstance(self.Log, self, Expander.ExpandDict(task.Params, self))
+            taskInstance: Task = task.GetTaskInstance(self.Log, self, Expander.Render(task.Template, self))
             if taskInstance.Label is None:
                 taskInstance.Label = f"Task_{i}"
             identifier = f'{taskInstance.name}({taskInstance.Label})'
@@ -35,17 +36,31 @@ class Executor(ExecutorBase):
                 taskInstance.Start()
 
                 # Add the values generated by the task to the global dictionary
-                self.params.update(taskInstance.Vault)
+                taskInstance.PropagateValues()
                 self.params['PreviousTaskLog'] = taskInstance.LogMessages
+                if previousLog is not None:
+                    previousLog.Close()  # Releases the spilled messages, if any
+                previousLog = taskInstance.LogMessages
                 self.Verdict = Verdict.Max(self.Verdict, taskInstance.Verdict)
 
                 self.AddMessage(f"Task '{identifier}' finished with verdict '{taskInstance.Verdict.name}'",
                                 int(floor(10 + ((i / len(tasks)) * 90))))
             except Exception as e:
+                taskInstance.LogMessages.Close()
                 self.Status = Status.Errored
                 self.Verdict = Verdict.Error
                 break
         else:
             self.Status = Status.Finished
 
+        if previousLog is not None:
+            previousLog.Close()
+        self.params['PreviousTaskLog'] = []
+        self.PublishTaskTimings()  # Before waiting for the results to be written
+
+        from Helper import InfluxDb  # Delayed to avoid cyclic imports
+        if not InfluxDb.Flush(self.ExecutionId):
+            self.LogAndMessage(Level.WARNING,
+                               "Not all results were written to InfluxDb (timeout, or pending in the spill folder)")
+
         self.SetFinished(percent=100)
@@ -1,22 +1,23 @@
 from Helper import Child, Level
 from Settings import Config
-from typing import Dict, Optional, List
+from typing import Dict, Optional, List, Iterable
 from Data import ExperimentDescriptor
 from Composer import PlatformConfiguration
 from datetime import datetime, timezone
-from Helper import Serialize
+from Helper import Serialize, Persistence
 from .enums import Status, Verdict
 from tempfile import TemporaryDirectory
 from Interfaces import PortalApi
+from threading import Lock
 
 
 class ExecutorBase(Child):
     portal: PortalApi = None
 
     def __init__(self, params: Dict, name: str, tempFolder: TemporaryDirectory = None):
-        if self.portal is None:
+        if ExecutorBase.portal is None:
             config = Config()
-            self.portal = PortalApi(config.Portal)
+            ExecutorBase.portal = PortalApi(config.Portal)
 
         now = datetime.now(timezone.utc)
         super().__init__(f"{name}{now.strftime('%y%m%d%H%M%S%f')}", tempFolder)
@@ -31,6 +32,9 @@ class ExecutorBase(Child):
         self.Messages = []
         self.PerCent = 0
         self.Verdict = Verdict.NotSet
+        self.paramsLock = Lock()
+        self.TaskTimings: List[Dict] = []  # See Task.recordTimings
+        self.timingsPublished = 0
         if not self.params.get('Deserialized', False):
             self.AddMessage("Init")
 
@@ -56,12 +60,45 @@ class ExecutorBase(Child):
 
 
     @property
-    def PreviousTaskLog(self) -> List[str]:
+    def PreviousTaskLog(self) -> Iterable[str]:
+        """Messages of the previous task (see Task.LogCapture). Iterate only once, spilled messages are streamed"""
         return self.params.get('PreviousTaskLog', [])
 
     def Run(self):
         raise NotImplementedError()
 
+    def PublishValues(self, values: Dict):
+        """Adds the values published by a task (Vault) to the executor parameters"""
+        with self.paramsLock:
+            self.params.update(values)
+
+    def AddTaskTimings(self, record: Dict):
+        with self.paramsLock:
+            self.TaskTimings.append(record)
+
+    def PublishTaskTimings(self):
+        """Sends the timings of the tasks finished since the last call to InfluxDb (as 'ELCM_Task_Timings')"""
+        from Helper import InfluxDb, InfluxPayload, InfluxPoint  # Delayed to avoid cyclic imports
+        with self.paramsLock:
+            records = self.TaskTimings[self.timingsPublished:]
+            self.timingsPublished = len(self.TaskTimings)
+        if len(records) == 0 or not Config().InfluxDb.Enabled:
+            return
+
+        payload = InfluxPayload("ELCM Task Timings")
+        payload.Tags = {'ExecutionId': str(self.ExecutionId), 'Stage': self.Tag}
+        for record in records:
+            point = InfluxPoint(record['Started'])
+            point.Fields = {'Task': record['Task'], 'Label': record['Label'], 'Verdict': record['Verdict']}
+            for step, values in record['Timings'].items():
+                point.Fields[f'{step}Wall'] = values['Wall']
+                point.Fields[f'{step}Cpu'] = values['Cpu']
+            payload.Points.append(point)
+        try:
+            InfluxDb.SendAsync(payload)
+        except Exception as e:
+            self.Log(Level.WARNING, f"Unable to send task timings to InfluxDb: {e}")
+
     def AddMessage(self, msg: str, percent: int = None):
         if percent is not None: self.PerCent = percent
         self.Messages.append(f'[{self.PerCent}%] {msg}')
@@ -82,10 +119,15 @@ class ExecutorBase(Child):
 
     def SetFinished(self, status=Status.Finished, percent: int = None):
         self.Finished = datetime.now(timezone.utc)
+        self.PublishTaskTimings()
         if self.Status.value < Status.Cancelled.value:
             self.Status = status
         self.LogAndMessage(Level.INFO, f"Finished (status: {self.Status.name}, verdict: {self.Verdict.name})", percent)
 
+    def onFinished(self):
+        from Status import ExecutionQueue
+        ExecutionQueue.Notify(self.ExecutionId)  # Advance the execution without waiting for the next sweep
+
     def findParent(self):  # Only running experiments should be able to use this method
         from Status import ExecutionQueue
         return ExecutionQueue.Find(self.ExecutionId)
@@ -130,19 +172,18 @@ class ExecutorBase(Child):
             'Log': self.LogFile,
             'Messages': self.Messages,
             'PerCent': self.PerCent,
-            'Verdict': self.Verdict.name
+            'Verdict': self.Verdict.name,
+            'TaskTimings': [{**record, 'Started': Serialize.DateToString(record['Started'])}
+                            for record in self.TaskTimings]
         }
         return data
 
     def Save(self):
-        data = self.Serialize()
-        path = Serialize.Path(self.Tag, str(self.ExecutionId))
-        Serialize.Save(data, path)
+        Persistence.Save(self.Tag, self.ExecutionId, self.Serialize())
 
     @classmethod
     def Load(cls, tag: str, id: str):
-        path = Serialize.Path(tag, id)
-        data = Serialize.Load(path)
+        data = Persistence.Load(tag, int(id))
         tag = data['Tag']
         params = {'ExecutionId': int(id), 'Deserialized': True}
         if tag == 'PreRunner':
@@ -164,5 +205,7 @@ class ExecutorBase(Child):
         res.Finished = Serialize.StringToDate(data['Finished'])
         res.Status = Status[data['Status']]
         res.Verdict = Verdict[data.get('Verdict', 'NotSet')]
+        res.TaskTimings = [{**record, 'Started': Serialize.StringToDate(record['Started'])}
+                           for record in data.get('TaskTimings', [])]
 
         return res
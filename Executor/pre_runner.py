@@ -1,9 +1,10 @@
 from typing import Dict
 from .Tasks.PreRun import CheckResources, Instantiate, Coordinate
 from .executor_base import ExecutorBase
+from .enums import Status
 from tempfile import TemporaryDirectory
-from time import sleep
 from Helper import Level
+from Facility import Admission
 
 
 class PreRunner(ExecutorBase):
@@ -24,19 +25,28 @@ class PreRunner(ExecutorBase):
         self.AddMessage("Coordination completed", 30)
 
         available = False
-        while not available:
-            result = CheckResources(self.Log, self.ExecutionId, self.Configuration.Requirements,
-                                    self.Configuration.NetworkServices, self).Start()
-            available = result['Available']
-            feasible = result['Feasible']
-            if not feasible:
-                self.AddMessage('Instantiation impossible. Aborting')
-                self.Log(Level.ERROR,
-                         'Unable to continue. Not enough total resources on VIMs for network services deployment')
-                raise RuntimeError("Not enough VIM resources for experiment.")
-            if not available:
-                self.AddMessage('Not available')
-                sleep(10)
+        requirements, networkServices = self.Configuration.Requirements, self.Configuration.NetworkServices
+        with Admission.Waiting(self, requirements, self.Descriptor.Exclusive, len(networkServices) != 0) as wakeUp:
+            while not available:
+                if self.stopRequested:
+                    self.cancel()
+                    return
+                wakeUp.clear()  # Releases that happen while checking will make the next wait return immediately
+                result = CheckResources(self.Log, self.ExecutionId, requirements, networkServices, self).Start()
+                available = result['Available']
+                feasible = result['Feasible']
+                if not feasible:
+                    self.AddMessage('Instantiation impossible. Aborting')
+                    self.Log(Level.ERROR,
+                             'Unable to continue. Not enough total resources on VIMs for network services deployment')
+                    raise RuntimeError("Not enough VIM resources for experiment.")
+                if not available:
+                    self.AddMessage('Not available')
+                    wakeUp.wait(Admission.RETRY_INTERVAL)
+
+        if self.stopRequested:
+            self.cancel()
+            return
 
         result = Instantiate(self.Log, self.TempFolder, self, self.Configuration.NetworkServices,
                              self.Configuration.Nest, self.Descriptor.Slice).Start()
@@ -47,3 +57,8 @@ class PreRunner(ExecutorBase):
         self.AddMessage('Instantiation completed', 80)
 
         self.SetFinished(percent=100)
+
+    def cancel(self):
+        self.LogAndMessage(Level.INFO, "Received stop request, exiting")
+        self.Status = Status.Cancelled
+        self.SetFinished(percent=100)
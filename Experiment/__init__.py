@@ -1,3 +1,3 @@
 from .experiment_run import ExperimentRun, CoarseStatus as ExperimentStatus
-from .execution_tombstone import Tombstone
-from .variable_expander import Expander
\ No newline at end of file
+from .execution_tombstone import Tombstone, ExecutionDigest
+from .variable_expander import Expander, Template
\ No newline at end of file
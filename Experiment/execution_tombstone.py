@@ -1,20 +1,68 @@
-from Helper import Serialize
+from Helper import Serialize, Persistence
 from Executor import Executor, Verdict
 from .experiment_run import CoarseStatus
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, Optional
 
 
-class Tombstone:
-    def __init__(self, id: str):
-        path = Serialize.Path('Execution', id)
-        data = Serialize.Load(path)
+class ExecutionDigest:
+    """Read-only summary of a finished execution. Unlike Tombstone, it does not load the execution stages"""
+
+    MAX_CACHED = 1024
+
+    lock = Lock()
+    cache: 'OrderedDict[int, ExecutionDigest]' = OrderedDict()  # Least recently used first
+
+    def __init__(self, data: Dict, modified: Optional[int] = None):
         self.Id, self.Cancelled, status = Serialize.Unroll(data, 'Id', 'Cancelled', 'CoarseStatus')
-        self.Params = {'Id': self.Id, 'Deserialized': True}
         self.CoarseStatus = CoarseStatus[status]
-        self.PreRunner = Executor.Load('PreRunner', str(self.Id))
-        self.Executor = Executor.Load('Executor', str(self.Id))
-        self.PostRunner = Executor.Load('PostRunner', str(self.Id))
         self.Created = Serialize.StringToDate(data['Created'])
         self.JsonDescriptor = data.get('JsonDescriptor', {})
         self.Milestones = data.get('Milestones', [])
         self.RemoteId = data.get('RemoteId', None)
         self.Verdict = Verdict[data.get('Verdict', 'NotSet')]
+        self.modified = modified
+
+    @classmethod
+    def Get(cls, executionId: int) -> Optional['ExecutionDigest']:
+        """Returns the (cached) digest of the execution, or None if it has not been saved"""
+        executionId = int(executionId)
+        modified = Persistence.Modified('Execution', executionId)
+        if modified is None:
+            return None
+
+        with cls.lock:
+            digest = cls.cache.get(executionId, None)
+            if digest is not None and digest.modified == modified:
+                cls.cache.move_to_end(executionId)
+                return digest
+
+        try:
+            digest = ExecutionDigest(Persistence.Load('Execution', executionId), modified)
+        except KeyError:
+            return None
+
+        with cls.lock:
+            cls.cache[executionId] = digest
+            cls.cache.move_to_end(executionId)
+            while len(cls.cache) > cls.MAX_CACHED:
+                cls.cache.popitem(last=False)
+        return digest
+
+
+class Tombstone:
+    def __init__(self, id: str):
+        digest = ExecutionDigest.Get(int(id))
+        if digest is None:
+            raise KeyError(f"Execution {id} not found")
+        self.Id, self.Cancelled, self.CoarseStatus = digest.Id, digest.Cancelled, digest.CoarseStatus
+        self.Params = {'Id': self.Id, 'Deserialized': True}
+        self.PreRunner = Executor.Load('PreRunner', str(self.Id))
+        self.Executor = Executor.Load('Executor', str(self.Id))
+        self.PostRunner = Executor.Load('PostRunner', str(self.Id))
+        self.Created = digest.Created
+        self.JsonDescriptor = digest.JsonDescriptor
+        self.Milestones = digest.Milestones
+        self.RemoteId = digest.RemoteId
+        self.Verdict = digest.Verdict
@@ -4,38 +4,51 @@ from typing import Dict, Optional, List
 from enum import Enum, unique
 from datetime import datetime, timezone
 from tempfile import TemporaryDirectory
-from Helper import Serialize, Log
+from Helper import Serialize, Log, Persistence, Metrics
 from Settings import Config
 from Interfaces import PortalApi
 from Composer import Composer, PlatformConfiguration
 from os.path import join, abspath
+from time import monotonic
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 
 
 @unique
 class CoarseStatus(Enum):
-    Init, PreRun, Run, PostRun, Finished, Cancelled, Errored = range(7)
+    Init, PreRun, Run, PostRun, Finalizing, Finished, Cancelled, Errored = range(8)
 
 
 class ExperimentRun:
+    COMPOSER_WORKERS = 2
+    FINALIZER_WORKERS = 2
+
     portal: PortalApi = None
     grafana = None
+    composerPool = ThreadPoolExecutor(max_workers=COMPOSER_WORKERS, thread_name_prefix='Composer')
+    finalizerPool = ThreadPoolExecutor(max_workers=FINALIZER_WORKERS, thread_name_prefix='Finalizer')
 
     def __init__(self, id: int, params: Dict):
+        """The platform configuration is not available until composed (see StartComposition)"""
         self.Id = id
         self.Params = params
         self.Params['ExecutionId'] = self.Id
-        self.Params['Configuration'] = Composer.Compose(self.Descriptor)
+        self.Composed = False
+        self.CompositionError: Optional[str] = None
         self.TempFolder = TemporaryDirectory(dir=Config().TempFolder)
         self.PreRunner = PreRunner(self.Params, tempFolder=self.TempFolder)
         self.Executor = Executor(self.Params, tempFolder=self.TempFolder)
         self.PostRunner = PostRunner(self.Params, tempFolder=self.TempFolder)
         self._coarseStatus = CoarseStatus.Init
+        self.statusChangedAt = monotonic()
         self._dashboardUrl = None
         self.Cancelled = False
         self.Milestones = []
         self.RemoteApi = None
         self.RemoteId = None
         self.Created = datetime.now(timezone.utc)
+        self.SchedulingDelays: Dict[str, float] = {}  # Seconds between the end of a phase and the next transition
+        self.FinalizationTimes: Dict[str, float] = {}  # Seconds spent on each step of the finalization
 
         if ExperimentRun.portal is None or ExperimentRun.grafana is None:
             from Helper import DashboardGenerator  # Delayed to avoid cyclic imports
@@ -74,7 +87,13 @@ class ExperimentRun:
     @CoarseStatus.setter
     def CoarseStatus(self, value: CoarseStatus):
         if value != self._coarseStatus:
+            from Status import ExecutionQueue  # Delayed to avoid cyclic imports
+            previous = self._coarseStatus
             self._coarseStatus = value
+            now = monotonic()
+            Metrics.Observe('elcm_execution_phase_seconds', now - self.statusChangedAt, phase=previous.name)
+            self.statusChangedAt = now
+            ExecutionQueue.StatusChanged(self, previous)
             ExperimentRun.portal.UpdateExecutionData(self.Id, status=value.name)
             if value.name not in self.Milestones:
                 self.Milestones.append(value.name)
@@ -91,12 +110,16 @@ class ExperimentRun:
 
     @property
     def Status(self) -> str:
-        if self.CoarseStatus == CoarseStatus.PreRun:
+        if self.CoarseStatus == CoarseStatus.Init and not self.Composed:
+            return 'Init: Composing'
+        elif self.CoarseStatus == CoarseStatus.PreRun:
             return f'PreRun: {self.PreRunner.Status.name}'
         elif self.CoarseStatus == CoarseStatus.Run:
             return f'Run: {self.Executor.Status.name}'
         elif self.CoarseStatus == CoarseStatus.PostRun:
             return f'PostRun: {self.PostRunner.Status.name}'
+        elif self.CoarseStatus == CoarseStatus.Finalizing and len(self.FinalizationTimes) != 0:
+            return f'Finalizing: {list(self.FinalizationTimes.keys())[-1]}'
         else:
             return self.CoarseStatus.name
 
@@ -142,11 +165,33 @@ class ExperimentRun:
         if self.CoarseStatus == CoarseStatus.PostRun: return self.PostRunner
         return None
 
+    def StartComposition(self):
+        """Generates the platform configuration in the background, the execution is notified once finished"""
+        self.composerPool.submit(self.compose)
+
+    def compose(self):
+        from Status import ExecutionQueue  # Delayed to avoid cyclic imports
+        try:
+            start = monotonic()
+            self.Params['Configuration'] = Composer.Compose(self.Descriptor)
+            Log.D(f'Execution {self.Id} composed in {monotonic() - start:.3f} seconds')
+        except Exception as e:
+            self.CompositionError = str(e)
+            Log.E(f'Exception while composing execution {self.Id}: {e}')
+        finally:
+            self.Composed = True
+            ExecutionQueue.Notify(self.Id)
+
     def Cancel(self):
-        current = self.CurrentChild
-        if current is not None:
-            current.RequestStop()
-        self.CoarseStatus = CoarseStatus.Cancelled
+        """Interrupts the PreRun and Run stages. If they have started, the execution still goes through PostRun so that
+        any slices and resources are released"""
+        if self.CoarseStatus == CoarseStatus.Finalizing:
+            return  # Already finished, only the results are being processed
+        self.Cancelled = True
+        self.PreRunner.RequestStop()
+        self.Executor.RequestStop()
+        if self.CoarseStatus == CoarseStatus.Init:
+            self.CoarseStatus = CoarseStatus.Cancelled
 
     def PreRun(self):
         self.CoarseStatus = CoarseStatus.PreRun
@@ -160,88 +205,160 @@ class ExperimentRun:
         self.CoarseStatus = CoarseStatus.PostRun
         self.PostRunner.Start()
 
+    def recordSchedulingDelay(self, child: ExecutorBase):
+        if child.finishedAt is not None:
+            delay = monotonic() - child.finishedAt
+            self.SchedulingDelays[child.Tag] = delay
+            Metrics.Observe('elcm_scheduling_delay_seconds', delay, stage=child.Tag)
+            Log.D(f'Execution {self.Id}: {child.Tag} end handled after {delay:.3f} seconds')
+
     def Advance(self):
         if not self.Active:
             return
         elif self.CoarseStatus == CoarseStatus.Init:
+            if not self.Composed:
+                return
+            if self.CompositionError is not None:
+                Log.I(f'Execution {self.Id} has failed on composition')
+                self.finalize(CoarseStatus.Errored)
+                return
             self.PreRun()
         elif self.CoarseStatus == CoarseStatus.PreRun:
+            if self.Cancelled and (self.PreRunner.HasFailed or self.PreRunner.Finished):
+                self.recordSchedulingDelay(self.PreRunner)
+                Log.I(f'Execution {self.Id} cancelled on PreRun, releasing resources')
+                self.PostRun()
+                return
             if self.PreRunner.HasFailed:
-                self.CoarseStatus = CoarseStatus.Errored
+                self.recordSchedulingDelay(self.PreRunner)
                 Log.I(f'Execution {self.Id} has failed on PreRun')
-                self.handleExecutionEnd()
+                self.finalize(CoarseStatus.Errored)
                 return
             if self.PreRunner.Finished:
+                self.recordSchedulingDelay(self.PreRunner)
                 self.Run()
         elif self.CoarseStatus == CoarseStatus.Run:
+            if self.Cancelled and (self.Executor.HasFailed or self.Executor.Finished):
+                self.recordSchedulingDelay(self.Executor)
+                Log.I(f'Execution {self.Id} cancelled on Run, releasing resources')
+                self.PostRun()
+                return
             if self.Executor.HasFailed:
-                self.CoarseStatus = CoarseStatus.Errored
+                self.recordSchedulingDelay(self.Executor)
                 Log.I(f'Execution {self.Id} has failed on Run')
-                self.handleExecutionEnd()
+                self.finalize(CoarseStatus.Errored)
                 return
             if self.Executor.Finished:
+                self.recordSchedulingDelay(self.Executor)
                 self.PostRun()
         elif self.CoarseStatus == CoarseStatus.PostRun:
             if self.PostRunner.HasFailed or self.PostRunner.Finished:
+                self.recordSchedulingDelay(self.PostRunner)
                 if self.PostRunner.HasFailed:
                     Log.I(f'Execution {self.Id} has failed on Run')
-                self.CoarseStatus = CoarseStatus.Errored if self.PostRunner.HasFailed else CoarseStatus.Finished
-                self.handleExecutionEnd()
-
-    def handleExecutionEnd(self):
-        allFiles = self.GeneratedFiles
-
-        # Handle results from the remote side
-        if self.RemoteId is not None and self.IsRemoteMaster:
-            if Config().InfluxDb.Enabled:
-                from Helper import InfluxDb, InfluxPayload
-                influx = InfluxDb()
-                Log.I(f'Trying to retrieve results from remote side database.')
-                results: List[InfluxPayload] = self.RemoteApi.GetResults(self.RemoteId)
-                Log.D(f'Retrieved {len(results)} payloads: {([p.Measurement for p in results])}')
-                for payload in results:
-                    payload.Measurement = f"Remote_{payload.Measurement}"
-                    payload.Tags['ExecutionId'] = str(self.ExecutionId)
-                    influx.Send(payload)
-                    Log.D(f"Sent '{payload.Measurement}' payload to database")
-
-            Log.I(f'Trying to retrieve remote side files.')
-            file = self.RemoteApi.GetFiles(self.RemoteId, self.TempFolder.name)
-            if file is not None:
-                allFiles.append(file)
-            else:
-                Log.W("Could not retrieve remote side files.")
-
-        # Compress all generated files
+                if self.Cancelled:
+                    self.finalize(CoarseStatus.Cancelled)
+                else:
+                    self.finalize(CoarseStatus.Errored if self.PostRunner.HasFailed else CoarseStatus.Finished)
+
+    def finalize(self, status: CoarseStatus):
+        """Results are processed in the background (Finalizing), the final status is set once finished"""
+        self.CoarseStatus = CoarseStatus.Finalizing
+        self.finalizerPool.submit(self.handleExecutionEnd, status)
+
+    @contextmanager
+    def finalizationStep(self, name: str):
+        start = monotonic()
+        self.FinalizationTimes[name] = 0.0
         try:
-            from Helper import Compress, IO
-            Log.I(f"Experiment generated files: {allFiles}")
-            folder = abspath(Config().ResultsFolder)
-            IO.EnsureFolder(folder)
-            path = join(folder, f"{self.Id}.zip")
-            Compress.Zip(allFiles, path, flat=True)
-        except Exception as e:
-            Log.E(f"Exception while compressing experiment files ({self.Id}): {e}")
+            yield
+        finally:
+            self.FinalizationTimes[name] = monotonic() - start
+            Metrics.Observe('elcm_finalization_step_seconds', self.FinalizationTimes[name], step=name)
 
-        # Try to create the dashboard even in case of error, there might be results to display
+    def handleExecutionEnd(self, status: CoarseStatus):
+        from Status import ExecutionQueue  # Delayed to avoid cyclic imports
+        start = monotonic()
         try:
-            Log.D(f"Automatically generating panels from log (AutoGraph) {self.Id}")
-            from Helper import AutoGraph
-            generated = AutoGraph.GeneratePanels(self.Configuration.DashboardPanels, self.Executor.RetrieveLogInfo())
-            self.Configuration.DashboardPanels.extend(generated)
-
-            if self.Executor.Started is not None:
-                Log.D(f"Trying to generate dashboard for execution {self.Id}")
-                self.Configuration.ExpandDashboardPanels(self)
-                url = ExperimentRun.grafana.Create(self)
-                self.DashboardUrl = url
-            else:
-                Log.D(f"Execution {self.Id} aborted during Pre-Run, skipping dashboard generation")
+            self.processResults()
         except Exception as e:
             Log.E(f"Exception while handling execution end ({self.Id}): {e}")
         finally:
-            Log.D(f"Clearing temp folder for execution {self.Id}")
-            self.TempFolder.cleanup()
+            steps = ', '.join(f'{name}: {value:.3f}s' for name, value in self.FinalizationTimes.items())
+            Log.I(f'Execution {self.Id} finalized in {monotonic() - start:.3f} seconds ({steps})')
+            self.CoarseStatus = status
+            ExecutionQueue.Notify(self.Id)
+
+    def processResults(self):
+        allFiles = self.GeneratedFiles
+
+        if self.RemoteId is not None and self.IsRemoteMaster:
+            with self.finalizationStep('RemoteResults'):
+                self.retrieveRemoteResults(allFiles)
+
+        # Try to create the dashboard even in case of error, there might be results to display
+        if self.Configuration is not None:  # Not composed otherwise, no dashboard
+            try:
+                with self.finalizationStep('AutoGraph'):
+                    Log.D(f"Automatically generating panels from log (AutoGraph) {self.Id}")
+                    from Helper import AutoGraph
+                    generated = AutoGraph.GeneratePanels(self.Configuration.DashboardPanels,
+                                                         self.Executor.RetrieveLogInfo())
+                    self.Configuration.DashboardPanels.extend(generated)
+
+                if self.Executor.Started is not None:
+                    with self.finalizationStep('Dashboard'):
+                        Log.D(f"Trying to generate dashboard for execution {self.Id}")
+                        self.Configuration.ExpandDashboardPanels(self)
+                        url = ExperimentRun.grafana.Create(self)
+                        self.DashboardUrl = url
+                else:
+                    Log.D(f"Execution {self.Id} aborted during Pre-Run, skipping dashboard generation")
+            except Exception as e:
+                Log.E(f"Exception while generating dashboard ({self.Id}): {e}")
+
+        # Compress all generated files, the temp folder is cleared once finished
+        with self.finalizationStep('Archive'):
+            try:
+                from Helper import Compress, IO
+                Log.I(f"Experiment generated files: {allFiles}")
+                folder = abspath(Config().ResultsFolder)
+                IO.EnsureFolder(folder)
+                Compress.Zip(allFiles, join(folder, f"{self.Id}.zip"), flat=True)
+                self.archiveFinished(None)
+            except Exception as e:
+                self.archiveFinished(e)
+
+    def retrieveRemoteResults(self, allFiles: List[str]):
+        if Config().InfluxDb.Enabled:
+            from Helper import InfluxDb
+            influx = InfluxDb()
+            Log.I(f'Trying to retrieve results from remote side database.')
+            count = 0
+            for payload in self.RemoteApi.GetResults(self.RemoteId):  # Retrieved page by page
+                payload.Measurement = f"Remote_{payload.Measurement}"
+                payload.Tags['ExecutionId'] = str(self.ExecutionId)
+                influx.SendAsync(payload)
+                count += 1
+                Log.D(f"Queued '{payload.Measurement}' payload for database ({len(payload.Points)} points)")
+            Log.I(f'Retrieved {count} payloads from remote side database.')
+            if not influx.Flush(self.ExecutionId):
+                Log.W('Not all remote side results were written to database (timeout, or pending in the spill folder).')
+
+        Log.I(f'Trying to retrieve remote side files.')
+        file = self.RemoteApi.GetFiles(self.RemoteId, self.TempFolder.name)
+        if file is not None:
+            allFiles.append(file)
+        else:
+            Log.W("Could not retrieve remote side files.")
+
+    def archiveFinished(self, error: Optional[Exception]):
+        if error is not None:
+            Log.E(f"Exception while compressing experiment files ({self.Id}): {error}")
+        else:
+            Log.I(f"Experiment files compressed ({self.Id})")
+        Log.D(f"Clearing temp folder for execution {self.Id}")
+        self.TempFolder.cleanup()
 
     def Serialize(self) -> Dict:
         data = {
@@ -256,14 +373,16 @@ class ExperimentRun:
         }
         return data
 
+    def SaveDescriptor(self):
+        """Saves the execution information (including the descriptor) but not the stages, which have not started"""
+        Persistence.Save('Execution', self.Id, self.Serialize())
+
     def Save(self):
         self.PreRunner.Save()
         self.Executor.Save()
         self.PostRunner.Save()
-        data = self.Serialize()
-        path = Serialize.Path('Execution', str(self.Id))
-        Serialize.Save(data, path)
+        Persistence.Save('Execution', self.Id, self.Serialize())
 
     @classmethod
     def Digest(cls, id: str) -> Dict:
-        return Serialize.Load(Serialize.Path('Execution', id))
+        return Persistence.Load('Execution', int(id))
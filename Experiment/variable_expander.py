@@ -1,38 +1,168 @@
-from typing import Dict, Union
+from typing import Dict, Union, List, Tuple, Optional
 from .experiment_run import ExperimentRun
 from Executor import ExecutorBase
-from re import finditer
+from re import finditer, compile
 from Settings import Config
 from json import dumps
+from threading import Lock
+from weakref import WeakKeyDictionary
 
 
-class Expander:
-    @classmethod
-    def ExpandDict(cls, dict: Dict, context: Union[ExecutorBase, ExperimentRun], flowState: Dict = None):
-        config = Config()
-        if flowState is None:
-            flowState = {}
-        return cls.expandParams(dict, context, config, flowState)
+class Template:
+    """Parameters (dictionaries, lists and strings, in any combination) parsed once into literal and placeholder
+    segments, so that they can be expanded repeatedly without searching for the placeholders every time"""
+
+    CONSTANT, LEGACY, STRING, DICT, LIST = range(5)
+    PLACEHOLDER = compile(r'@{(.*?)}|@\[(.*?)]')
+
+    def __init__(self, item: object):
+        self.Root = self.compile(item)
 
     @classmethod
-    def expandParams(cls, item: object, context: Union[ExecutorBase, ExperimentRun],
-                     config: Config, flowState: Dict) -> object:
+    def compile(cls, item: object) -> Tuple:
         if isinstance(item, dict):
-            res = {}
-            for key, value in item.items():
-                res[key] = cls.expandParams(value, context, config, flowState)
+            return cls.DICT, [(key, cls.compile(value)) for key, value in item.items()]
         elif isinstance(item, list) or isinstance(item, tuple):
-            res = []
-            for value in item:
-                res.append(cls.expandParams(value, context, config, flowState))
+            return cls.LIST, [cls.compile(value) for value in item]
         elif isinstance(item, str):
-            res = cls.expand(item, context, config, flowState)
+            return cls.compileString(item)
         else:
-            res = item
-        return res
+            return cls.CONSTANT, item
+
+    @classmethod
+    def compileString(cls, item: str) -> Tuple:
+        if '@' not in item:
+            return cls.CONSTANT, item
+
+        segments: List[Union[str, Tuple]] = []
+        position = 0
+        for match in cls.PLACEHOLDER.finditer(item):
+            if match.start() != position:
+                segments.append(item[position:match.start()])
+            position = match.end()
+
+            name, capture = match.groups()
+            if name is not None:
+                if '@' in name:  # Nested placeholders, keep the original expansion order
+                    return cls.LEGACY, item
+                segments.append(('{', name, match.group()))
+            else:
+                if '@' in capture:
+                    return cls.LEGACY, item
+                try:
+                    key, default = capture.split(':') if ':' in capture else (capture, '<<UNDEFINED>>')
+                    group, key = key.split('.') if '.' in key else (None, key)
+                except ValueError:  # Malformed, fail (if needed) during expansion, as usual
+                    return cls.LEGACY, item
+                segments.append(('[', group, key, default))
+
+        if position != len(item):
+            segments.append(item[position:])
+        return cls.STRING, segments
+
+
+class ContextValues:
+    """Values available as @{Name}, calculated on first use and reused while the context (executor) exists"""
+
+    MISSING = object()
+
+    # Values that may change during the execution are not cached
+    dynamic = {
+        "SliceId": lambda context, config: context.Params.get("DeployedSliceId", "None"),
+        "DeployedSliceId": lambda context, config: context.Params.get("DeployedSliceId", "None"),
+    }
+
+    static = {
+        "TempFolder": lambda context, config: context.TempFolder,
+        "ExecutionId": lambda context, config: context.ExecutionId,
+        "Application": lambda context, config: context.Descriptor.Application,
+        "JSONParameters": lambda context, config: dumps(context.Descriptor.Parameters, indent=None),
+        "ReservationTime": lambda context, config: context.Descriptor.Duration or 0,
+        "ReservationTimeSeconds": lambda context, config: (context.Descriptor.Duration or 0) * 60,
+        "TapFolder": lambda context, config: config.Tap.Folder,
+        "TapResults": lambda context, config: config.Tap.Results,
+    }
+
+    def __init__(self):
+        self.values: Dict[str, str] = {}
+        self.config: Optional[Config] = None
+
+    def Get(self, name: str, context: Union[ExecutorBase, ExperimentRun]) -> object:
+        """Returns the value as string, or MISSING if the name is not known"""
+        value = self.values.get(name, None)
+        if value is None:
+            factory = self.dynamic.get(name, None) or self.static.get(name, None)
+            if factory is None:
+                return self.MISSING
+            if self.config is None:
+                self.config = Config()
+            value = str(factory(context, self.config))
+            if name in self.static:
+                self.values[name] = value
+        return value
+
+
+class Expander:
+    lock = Lock()
+    contextValues: 'WeakKeyDictionary[object, ContextValues]' = WeakKeyDictionary()
+
+    @classmethod
+    def ExpandDict(cls, dict: Dict, context: Union[ExecutorBase, ExperimentRun], flowState: Dict = None):
+        return cls.Render(Template(dict), context, flowState)
+
+    @classmethod
+    def Render(cls, template: Template, context: Union[ExecutorBase, ExperimentRun], flowState: Dict = None):
+        """Expands a pre-compiled template (see TaskDefinition.Template)"""
+        return cls.render(template.Root, context, cls.getContextValues(context), flowState or {})
+
+    @classmethod
+    def getContextValues(cls, context: Union[ExecutorBase, ExperimentRun]) -> ContextValues:
+        with cls.lock:
+            values = cls.contextValues.get(context, None)
+            if values is None:
+                values = cls.contextValues[context] = ContextValues()
+            return values
+
+    @classmethod
+    def render(cls, node: Tuple, context: Union[ExecutorBase, ExperimentRun],
+               values: ContextValues, flowState: Dict) -> object:
+        kind, content = node
+        if kind == Template.CONSTANT:
+            return content
+        elif kind == Template.STRING:
+            return ''.join(cls.renderSegment(segment, context, values, flowState) for segment in content)
+        elif kind == Template.DICT:
+            return {key: cls.render(value, context, values, flowState) for key, value in content}
+        elif kind == Template.LIST:
+            return [cls.render(value, context, values, flowState) for value in content]
+        else:
+            return cls.expand(content, context, Config(), flowState)
+
+    @classmethod
+    def renderSegment(cls, segment: Union[str, Tuple], context: Union[ExecutorBase, ExperimentRun],
+                      values: ContextValues, flowState: Dict) -> str:
+        if isinstance(segment, str):
+            return segment
+
+        if segment[0] == '{':
+            _, name, original = segment
+            if name in flowState:  # [Iter0|Iter1|Branch] on the current level, if applies
+                return str(flowState[name])
+            value = values.Get(name, context)
+            return original if value is ContextValues.MISSING else value
+        else:
+            _, group, key, default = segment
+            if group is None or group == "Publish":
+                collection = context.params
+            elif group == "Params":
+                collection = context.Descriptor.Parameters
+            else:
+                return f'<<UNKNOWN GROUP {group}>>'
+            return str(collection.get(key, default))
 
     @classmethod
     def expand(cls, item: str, context: Union[ExecutorBase, ExperimentRun], config: Config, flowState: Dict) -> str:
+        """Expands a single string without pre-compilation. Used for strings with nested placeholders"""
         duration = context.Descriptor.Duration or 0
         replacements = {
             # Dynamic values
@@ -1,3 +1,4 @@
 from .facility import Facility
+from .admission import Admission
 from .action_information import ActionInformation
 from .dashboard_panel import DashboardPanel
@@ -0,0 +1,54 @@
+from Helper import Log
+from typing import Dict, List, Set
+from threading import Lock, Event
+from contextlib import contextmanager
+
+
+class Waiter:
+    def __init__(self, executionId: int, resourceIds: List[str], exclusive: bool, needsVim: bool):
+        self.ExecutionId = executionId
+        self.ResourceIds: Set[str] = set(resourceIds)
+        self.Exclusive = exclusive
+        self.NeedsVim = needsVim
+        self.WakeUp = Event()
+
+    def IsAffectedBy(self, released: Set[str], releasedExclusive: bool, releasedVim: bool) -> bool:
+        return (releasedExclusive or self.Exclusive or (self.NeedsVim and releasedVim)
+                or len(self.ResourceIds & released) != 0)
+
+
+class Admission:
+    """Executions waiting for resources. Instead of retrying periodically, waiting executions are woken up as soon
+    as an execution that held resources they could need releases them"""
+
+    RETRY_INTERVAL = 60  # Seconds, safety net for changes not notified to the ELCM (e.g. VIM capacity)
+
+    lock = Lock()
+    waiters: Dict[int, Waiter] = {}
+
+    @classmethod
+    @contextmanager
+    def Waiting(cls, owner: 'ExecutorBase', resourceIds: List[str], exclusive: bool, needsVim: bool):
+        """Registers the execution as waiting for resources while inside the context. Yields the event that is set
+        when it is worth retrying (the event is also set if the execution is cancelled)"""
+        waiter = Waiter(owner.ExecutionId, resourceIds, exclusive, needsVim)
+        with cls.lock:
+            cls.waiters[waiter.ExecutionId] = waiter
+        handle = owner.Cancellation.Register(waiter.WakeUp.set)
+        try:
+            yield waiter.WakeUp
+        finally:
+            owner.Cancellation.Unregister(handle)
+            with cls.lock:
+                cls.waiters.pop(waiter.ExecutionId, None)
+
+    @classmethod
+    def Released(cls, resourceIds: List[str], exclusive: bool, usedVim: bool):
+        """Wakes up the waiting executions that may be able to start now, oldest first"""
+        released = set(resourceIds)
+        with cls.lock:
+            waiters = sorted(cls.waiters.values(), key=lambda w: w.ExecutionId)
+        for waiter in waiters:
+            if waiter.IsAffectedBy(released, exclusive, usedVim):
+                Log.D(f"Waking up execution {waiter.ExecutionId}: resources released")
+                waiter.WakeUp.set()
@@ -2,9 +2,11 @@ from os.path import abspath
 from .action_information import ActionInformation
 from .dashboard_panel import DashboardPanel
 from .resource import Resource
-from Helper import Log, Level
-from typing import Dict, List, Tuple, Optional
+from .admission import Admission
+from Helper import Log, Level, Metrics
+from typing import Dict, List, Tuple, Optional, Set
 from threading import Lock
+from time import monotonic
 from Utils import synchronized
 from .Loader import Loader, ResourceLoader, ScenarioLoader, UeLoader, TestCaseLoader
 
@@ -12,8 +14,12 @@ from .Loader import Loader, ResourceLoader, ScenarioLoader, UeLoader, TestCaseLo
 class Facility:
     lock = Lock()
     requesters: Dict[str, List[str]] = {}
+    requestedBy: Dict[str, Set[int]] = {}  # Inverse of requesters: resource id -> executions requesting it
+    requestedAt: Dict[int, float] = {}  # Time of the first request, per execution
     activeExperiments = 0
+    holders: Set[int] = set()  # Executions that have successfully locked their resources
     activeExclusive: Optional[int] = None
+    Version = 0  # Increased on every reload, for invalidating information derived from the facility
 
     TESTCASE_FOLDER = abspath('TestCases')
     UE_FOLDER = abspath('UEs')
@@ -77,6 +83,8 @@ class Facility:
             else:
                 cls.Validation.append((Level.INFO, f'{len(keys)} {name} defined on the facility: {(", ".join(keys))}.'))
 
+        cls.Version += 1
+
     @classmethod
     def GetUEActions(cls, id: str) -> List[ActionInformation]:
         return cls.ues.get(id, [])
@@ -127,6 +135,9 @@ class Facility:
 
         if owner.ExecutionId not in cls.requesters.keys():
             cls.requesters[executor] = resourceIds
+            cls.requestedAt[executor] = monotonic()
+            for id in resourceIds:
+                cls.requestedBy.setdefault(id, set()).add(executor)
 
         # For exclusive experiments check if something else is running
         if exclusive and cls.activeExperiments != 0:
@@ -145,12 +156,11 @@ class Facility:
                 return False
 
         # Check if some earlier experiment is requesting the same resources
-        for key, values in cls.requesters.items():
-            if key < executor:  # Check only older executors
-                intersect = list(set(values) & set(resourceIds))
-                if len(intersect) != 0:
-                    Log.D(f"Resources denied to {executor} due to conflict with {key} ({intersect})")
-                    return False
+        for id in resourceIds:
+            older = [key for key in cls.requestedBy.get(id, ()) if key < executor]  # Check only older executors
+            if len(older) != 0:
+                Log.D(f"Resources denied to {executor} due to conflict with {min(older)} ({id})")
+                return False
 
         # Try to lock all the required resources
         for id in resourceIds:
@@ -164,7 +174,10 @@ class Facility:
 
         if exclusive:
             cls.activeExclusive = owner.ExecutionId
+        cls.holders.add(executor)
         cls.activeExperiments += 1
+        Metrics.Observe('elcm_resource_wait_seconds', monotonic() - cls.requestedAt.pop(executor, monotonic()),
+                        exclusive=exclusive)
 
         return True
 
@@ -172,12 +185,29 @@ class Facility:
     @synchronized(lock)
     def ReleaseResources(cls, ids: List[str], owner: 'ExecutorBase'):
         execution = owner.ExecutionId
-        _ = cls.requesters.pop(execution, None)
-        cls._releaseResources(ids)
-
-        if execution == cls.activeExclusive:
-            cls.activeExclusive = None
-        cls.activeExperiments -= 1
+        requested = cls.requesters.pop(execution, [])
+        cls.requestedAt.pop(execution, None)
+        for id in requested:
+            requesters = cls.requestedBy.get(id, set())
+            requesters.discard(execution)
+            if len(requesters) == 0:
+                cls.requestedBy.pop(id, None)
+
+        wasExclusive = (execution == cls.activeExclusive)
+        if execution in cls.holders:  # Otherwise cancelled while waiting for the resources, nothing was locked
+            cls.holders.discard(execution)
+            cls._releaseResources(ids)
+
+            if wasExclusive:
+                cls.activeExclusive = None
+            cls.activeExperiments -= 1
+
+        configuration = owner.Configuration
+        usedVim = configuration is not None and len(configuration.NetworkServices) != 0
+        if usedVim:
+            from Interfaces import Management  # Delayed to avoid cyclic imports
+            Management.InvalidateVimResources()  # The network services have been decommissioned
+        Admission.Released(requested, wasExclusive, usedVim)
 
     @classmethod
     def _releaseResources(cls, ids: List[str]):
@@ -1,11 +1,15 @@
 from .log import Log, LogInfo
 from .log_level import Level
+from .metrics import Metrics
+from .cancellation import CancellationToken
 from .child import Child
 from .serialize import Serialize
+from .persistence import Persistence, PersistenceBackend, YamlBackend, SqliteBackend
 from .tap_executor import Tap
 from .cli_executor import Cli
 from .dashboard_generator import DashboardGenerator
 from .influx import InfluxDb, InfluxPayload, InfluxPoint
+from .influx_writer import InfluxWriter
 from .compress import Compress
 from .io import IO
 from .autograph import AutoGraph
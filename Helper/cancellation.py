@@ -0,0 +1,50 @@
+from threading import Event, Lock
+from typing import Callable, Dict
+
+
+class CancellationToken:
+    """Signals that an execution (stage) should stop as soon as possible. Waits performed through the token return
+    immediately once it is cancelled, and any registered callbacks (e.g. for terminating a subprocess) are invoked"""
+
+    def __init__(self):
+        self.event = Event()
+        self.lock = Lock()
+        self.callbacks: Dict[int, Callable] = {}
+        self.nextHandle = 0
+
+    @property
+    def Cancelled(self) -> bool:
+        return self.event.is_set()
+
+    def Cancel(self):
+        with self.lock:
+            if self.event.is_set():
+                return
+            self.event.set()
+            callbacks = list(self.callbacks.values())
+            self.callbacks.clear()
+
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass  # The resource may have been released in the meantime
+
+    def Wait(self, seconds: float) -> bool:
+        """Sleeps for the specified number of seconds. Returns True (as soon as it happens) if cancelled"""
+        return self.event.wait(seconds)
+
+    def Register(self, callback: Callable) -> int:
+        """Registers a callback to be invoked on cancellation (immediately if already cancelled). Returns a handle
+        that can be used for unregistering the callback"""
+        with self.lock:
+            if not self.event.is_set():
+                self.nextHandle += 1
+                self.callbacks[self.nextHandle] = callback
+                return self.nextHandle
+        callback()
+        return 0
+
+    def Unregister(self, handle: int):
+        with self.lock:
+            self.callbacks.pop(handle, None)
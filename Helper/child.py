@@ -1,9 +1,10 @@
-from Helper import Log, Level, LogInfo
+from Helper import Log, Level, LogInfo, CancellationToken
 from os.path import realpath, exists
 from os import makedirs
 import threading
+from time import monotonic
 from tempfile import TemporaryDirectory
-from typing import List
+from typing import List, Optional, Tuple, Set
 
 
 class Child:
@@ -18,7 +19,8 @@ class Child:
         self.hasStarted = False
         self.hasFailed = False
         self.hasFinished = False
-        self.stopRequested = False
+        self.Cancellation = CancellationToken()
+        self.finishedAt: Optional[float] = None  # Monotonic time, used for measuring scheduling delays
         self.TempFolder = None if tempFolder is None else tempFolder.name
         self.tempFolderIsExternal = (tempFolder is not None)
         self.LogFile = None
@@ -33,7 +35,15 @@ class Child:
         self.thread.start()
 
     def RequestStop(self):
-        self.stopRequested = True
+        self.Cancellation.Cancel()
+
+    @property
+    def stopRequested(self) -> bool:
+        return self.Cancellation.Cancelled
+
+    def Wait(self, seconds: float) -> bool:
+        """Sleeps for the specified number of seconds. Returns True (as soon as it happens) if a stop is requested"""
+        return self.Cancellation.Wait(seconds)
 
     def _runWrapper(self):
         def _innerRun():
@@ -50,7 +60,9 @@ class Child:
                     self.Log(Level.DEBUG, line.strip())
             finally:
                 self.hasFinished = True
+                self.finishedAt = monotonic()
                 Log.CloseLogFile(self.name)
+                self.onFinished()
 
         if self.tempFolderIsExternal:
             _innerRun()
@@ -64,6 +76,9 @@ class Child:
     def Run(self):
         raise NotImplementedError()
 
+    def onFinished(self):
+        pass  # Allow subclasses to be notified when the thread is about to end (successfully or not)
+
     def RetrieveLog(self, tail: int = None) -> List[str]:
         if not self.hasStarted: return []
         return Log.RetrieveLog(self.LogFile, tail)
@@ -71,3 +86,12 @@ class Child:
     def RetrieveLogInfo(self, tail: int = None) -> LogInfo:
         if not self.hasStarted: return LogInfo()
         return Log.RetrieveLogInfo(self.LogFile, tail)
+
+    def RetrieveLogInfoSince(self, cursor: int) -> Tuple[LogInfo, int]:
+        if not self.hasStarted: return LogInfo(), cursor
+        return Log.RetrieveLogInfoSince(self.LogFile, cursor)
+
+    def RetrieveFilteredLogInfo(self, cursor: int, levels: Optional[Set[str]],
+                                label: Optional[str]) -> Tuple[LogInfo, int]:
+        if not self.hasStarted: return LogInfo(), cursor
+        return Log.RetrieveFilteredLogInfo(self.LogFile, cursor, levels, label)
@@ -1,19 +1,31 @@
 import subprocess
-from Helper import Level
-from typing import Callable, List
+from Helper import Level, CancellationToken
+from typing import Callable, List, Optional
 
 
 class Cli:
-    def __init__(self, parameters: List[str], cwd: str, logger: Callable):
+    def __init__(self, parameters: List[str], cwd: str, logger: Callable,
+                 cancellation: Optional[CancellationToken] = None):
         self.parameters = parameters
         self.cwd = cwd
         self.logger = logger
+        self.cancellation = cancellation
 
     def Execute(self) -> int:
         process = subprocess.Popen(self.parameters, stdout=subprocess.PIPE,
                                    stderr=subprocess.STDOUT, cwd=self.cwd)
-        self.stdout(process)
-        return process.wait()
+        handle = None if self.cancellation is None else self.cancellation.Register(lambda: self.terminate(process))
+        try:
+            self.stdout(process)
+            return process.wait()
+        finally:
+            if handle is not None:
+                self.cancellation.Unregister(handle)
+
+    def terminate(self, process: subprocess.Popen):
+        if process.poll() is None:
+            self.logger(Level.WARNING, "[CLI]Execution cancelled, terminating process")
+            process.terminate()
 
     def stdout(self, process: subprocess.Popen):
         pipe = process.stdout
@@ -1,22 +1,51 @@
 from typing import List
+from glob import glob
 import zipfile
-from os.path import abspath, dirname, basename
+from os import replace, remove
+from os.path import abspath, dirname, basename, splitext, exists, join
 
 
 class Compress:
+    # Files with these extensions are already compressed, and are stored without compressing them again
+    STORED_EXTENSIONS = {'.zip', '.gz', '.tgz', '.bz2', '.xz', '.7z', '.rar', '.jar',
+                         '.png', '.jpg', '.jpeg', '.gif', '.webp', '.mp3', '.mp4', '.mkv', '.pdf', '.docx', '.xlsx'}
+
     @staticmethod
     def Zip(files: List[str], output: str, flat: bool = False) -> None:
-        output = zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED)
+        """Creates the archive under a temporary name, renamed to 'output' once complete"""
+        temporal = f'{output}.part'
+        try:
+            with zipfile.ZipFile(temporal, 'w', zipfile.ZIP_DEFLATED) as archive:
+                files = [abspath(file) for file in files]
+                rootFolder = Compress.getRootPath(files)
+
+                for file in files:
+                    archiveName = basename(file) if flat else file.replace(rootFolder, '')
+                    compression = zipfile.ZIP_STORED if Compress.isCompressed(file) else zipfile.ZIP_DEFLATED
+                    archive.write(file, archiveName, compress_type=compression)
+        except Exception:
+            if exists(temporal):  # Otherwise the archive would be reported as 'being compressed' forever
+                remove(temporal)
+            raise
 
-        files = [abspath(file) for file in files]
-        rootFolder = Compress.getRootPath(files)
+        replace(temporal, output)
 
-        for file in files:
-            file = abspath(file)
-            archiveName = basename(file) if flat else file.replace(rootFolder, '')
-            output.write(file, archiveName)
+    @staticmethod
+    def RemovePartial(folder: str) -> List[str]:
+        """Removes the incomplete archives ('.part') of the folder, left if the ELCM stopped while compressing them.
+        Call only when no archives are being generated. Returns the removed files"""
+        removed = []
+        for file in glob(join(folder, '*.part')):
+            try:
+                remove(file)
+                removed.append(file)
+            except OSError:
+                pass
+        return removed
 
-        output.close()
+    @staticmethod
+    def isCompressed(file: str) -> bool:
+        return splitext(file)[1].lower() in Compress.STORED_EXTENSIONS
 
     @staticmethod
     def getRootPath(files: List[str]) -> str:
@@ -30,4 +59,4 @@ class Compress:
         if len(files) == 1:
             return dirname(files[0])
         else:
-            return ''.join(iterator(files))
\ No newline at end of file
+            return ''.join(iterator(files))
@@ -1,9 +1,11 @@
 from influxdb import InfluxDBClient
 from Settings import Config
-from typing import Dict, List, Union
-from datetime import datetime, timezone
-from csv import DictWriter, DictReader, Dialect, QUOTE_NONE
+from typing import Dict, List, Union, Optional, Iterator, Callable, Tuple
+from datetime import datetime, timezone, timedelta
+from csv import DictWriter, Dialect, QUOTE_NONE, reader
 from os.path import abspath
+from .influx_writer import InfluxWriter
+from .metrics import Metrics
 import re
 
 
@@ -16,6 +18,38 @@ class InfluxPoint:
         return f"<{self.Time} {self.Fields}>"
 
 
+class LineProtocol:
+    """Escaping rules follow those of the influxdb client (influxdb.line_protocol)"""
+
+    EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+    MICROSECOND = timedelta(microseconds=1)
+
+    keyTable = str.maketrans({'\\': '\\\\', ' ': '\\ ', ',': '\\,', '=': '\\=', '\n': '\\n'})
+    stringTable = str.maketrans({'\\': '\\\\', '"': '\\"', '\n': '\\n'})
+
+    @classmethod
+    def Escape(cls, value: str) -> str:
+        """For measurement names, tag keys, tag values and field keys"""
+        return value.translate(cls.keyTable)
+
+    @classmethod
+    def FieldValue(cls, value: object) -> str:
+        if isinstance(value, bool):  # Check before int, bool is a subclass
+            return str(value)
+        if isinstance(value, int):
+            return f'{value}i'
+        if isinstance(value, float):
+            return repr(value)
+        return f'"{str(value).translate(cls.stringTable)}"'
+
+    @classmethod
+    def Timestamp(cls, time: datetime) -> int:
+        """Nanoseconds since the epoch. Naive datetimes are considered UTC"""
+        if time.tzinfo is None:
+            time = time.replace(tzinfo=timezone.utc)
+        return ((time - cls.EPOCH) // cls.MICROSECOND) * 1000
+
+
 class InfluxPayload:
     def __init__(self, measurement: str):
         self.Measurement = re.sub(r'\W+', '_', measurement)  # Replace spaces and non-alphanumeric characters with _
@@ -34,6 +68,22 @@ class InfluxPayload:
             )
         return data
 
+    @property
+    def LineProtocol(self) -> List[str]:
+        """Encodes the payload as InfluxDb line protocol (nanosecond precision). Measurement and tags are escaped
+        only once, since they are shared by all the points."""
+        tags = ''.join(f',{LineProtocol.Escape(str(key))}={LineProtocol.Escape(str(value))}'
+                       for key, value in sorted(self.Tags.items()) if value is not None and str(value) != '')
+        prefix = f'{LineProtocol.Escape(self.Measurement)}{tags} '
+
+        lines = []
+        for point in self.Points:
+            fields = ','.join(f'{LineProtocol.Escape(str(key))}={LineProtocol.FieldValue(value)}'
+                              for key, value in sorted(point.Fields.items()) if value is not None)
+            if len(fields) != 0:  # Points without fields are not accepted by InfluxDb
+                lines.append(f'{prefix}{fields} {LineProtocol.Timestamp(point.Time)}')
+        return lines
+
     def __str__(self):
         return f"InfluxPayload['{self.Measurement}' - Tags: {self.Tags} - " + \
             f"Points: [{', '.join(str(p) for p in self.Points)}]]"
@@ -50,6 +100,20 @@ class InfluxPayload:
             res.Points.append(influxPoint)
         return res
 
+    @classmethod
+    def FromColumnarData(cls, measurement: str, series: Dict) -> 'InfluxPayload':
+        """Inverse of InfluxDb.GetMeasurementPage, for a single series. Times are microseconds since the epoch"""
+        res = InfluxPayload(measurement)
+        res.Tags = series['tags']
+        fields = series['fields']
+        for index, timestamp in enumerate(series['time']):
+            influxPoint = InfluxPoint(LineProtocol.EPOCH + timedelta(microseconds=timestamp))
+            for key, values in fields.items():
+                if values[index] is not None:
+                    influxPoint.Fields[key] = values[index]
+            res.Points.append(influxPoint)
+        return res
+
 
 class baseDialect(Dialect):
     delimiter = ','
@@ -73,7 +137,7 @@ class InfluxDb:
         influx = config.InfluxDb
         try:
             cls.client = InfluxDBClient(influx.Host, influx.Port,
-                                        influx.User, influx.Password, influx.Database)
+                                        influx.User, influx.Password, influx.Database, gzip=influx.Gzip)
         except Exception as e:
             raise Exception(f"Exception while creating Influx client, please review configuration: {e}") from e
 
@@ -98,7 +162,32 @@ class InfluxDb:
             cls.initialize()
 
         payload.Tags.update(cls.baseTags)
-        cls.client.write_points(payload.Serialized)
+        lines = payload.LineProtocol
+        if len(lines) != 0:
+            cls.WriteLines(lines)
+
+    @classmethod
+    def SendAsync(cls, payload: InfluxPayload):
+        """Enqueues the payload on the process-wide write buffer. Use Flush to ensure that the values are written"""
+        if cls.client is None:
+            cls.initialize()
+
+        payload.Tags.update(cls.baseTags)
+        InfluxWriter.Put(payload.Tags.get('ExecutionId', None), payload.LineProtocol)
+
+    @classmethod
+    def Flush(cls, executionId: Union[int, str], timeout: float = InfluxWriter.FLUSH_TIMEOUT) -> bool:
+        """Waits until all payloads sent asynchronously for the execution are written (or spilled to disk)"""
+        return InfluxWriter.Flush(str(executionId), timeout)
+
+    @classmethod
+    def WriteLines(cls, lines: List[str]):
+        if cls.client is None:
+            cls.initialize()
+
+        cls.client.write_points(lines, time_precision='n', protocol='line')
+        Metrics.Increment('elcm_influxdb_points_total', len(lines))
+        Metrics.Increment('elcm_influxdb_bytes_total', sum(len(line.encode('utf-8')) + 1 for line in lines))
 
     @classmethod
     def PayloadToCsv(cls, payload: InfluxPayload, outputFile: str):
@@ -118,17 +207,39 @@ class InfluxDb:
                 data.update(payload.Tags)
                 csv.writerow(data)
 
+    @staticmethod
+    def convert(value: str) -> Union[int, float, bool, str]:
+        try: return int(value)
+        except ValueError: pass
+
+        try: return float(value)
+        except ValueError: pass
+
+        return {'true': True, 'false': False}.get(value.lower(), value)
+
+    @staticmethod
+    def toBool(value: str) -> bool:
+        res = {'true': True, 'false': False}.get(value.lower(), None)
+        if res is None:
+            raise ValueError(f"'{value}' is not a boolean")
+        return res
+
     @classmethod
     def CsvToPayload(cls, measurement: str, csvFile: str, delimiter: str, timestampKey: str,
                      tryConvert: bool = True, keysToRemove: List[str] = None) -> InfluxPayload:
-        def _convert(value: str) -> Union[int, float, bool, str]:
-            try: return int(value)
-            except ValueError: pass
-
-            try: return float(value)
-            except ValueError: pass
+        payload = InfluxPayload(measurement)
+        for batch in cls.CsvToPayloads(measurement, csvFile, delimiter, timestampKey,
+                                       tryConvert=tryConvert, keysToRemove=keysToRemove, batchSize=None):
+            payload.Points.extend(batch.Points)
+        return payload
 
-            return {'true': True, 'false': False}.get(value.lower(), value)
+    @classmethod
+    def CsvToPayloads(cls, measurement: str, csvFile: str, delimiter: str, timestampKey: str,
+                      tryConvert: bool = True, keysToRemove: List[str] = None,
+                      batchSize: Optional[int] = 10000) -> Iterator[InfluxPayload]:
+        """Reads the CSV file row by row, yielding payloads of up to `batchSize` points (or a single payload with
+        all the points if `batchSize` is None), so that only one batch needs to be kept in memory.
+        The type of each column is inferred from its first non-empty value and reused for the following rows."""
 
         keysToRemove = [] if keysToRemove is None else keysToRemove
 
@@ -146,11 +257,18 @@ class InfluxDb:
             dialect = baseDialect()
             dialect.delimiter = str(delimiter.strip())
 
-            csv = DictReader(file, fieldnames=keys, restval=None, dialect=dialect)
-            payload = InfluxPayload(measurement)
+            csv = reader(file, dialect=dialect)
+            timestampIndex = keys.index(timestampKey)
+            columns = [(index, key) for index, key in enumerate(keys)
+                       if index != timestampIndex and key not in keysToRemove]
+            converters: Dict[int, Callable] = {}
 
+            payload = InfluxPayload(measurement)
             for row in csv:
-                timestampValue = float(row.pop(timestampKey))
+                if len(row) == 0:
+                    continue
+
+                timestampValue = float(row[timestampIndex])
                 try:
                     timestamp = datetime.fromtimestamp(timestampValue, tz=timezone.utc)
                 except (OSError, ValueError):
@@ -158,15 +276,33 @@ class InfluxDb:
                     timestamp = datetime.fromtimestamp(timestampValue/1000.0, tz=timezone.utc)
 
                 point = InfluxPoint(timestamp)
-                for key, value in row.items():
-                    if key in keysToRemove:
-                        continue
-                    if tryConvert:
-                        value = _convert(value)
+                for index, key in columns:
+                    value = row[index] if index < len(row) else None
+                    if tryConvert and value is not None:
+                        value = cls.convertColumn(value, index, converters)
                     point.Fields[key] = value
                 payload.Points.append(point)
 
-            return payload
+                if batchSize is not None and len(payload.Points) >= batchSize:
+                    yield payload
+                    payload = InfluxPayload(measurement)
+
+            if len(payload.Points) != 0 or batchSize is None:
+                yield payload
+
+    @classmethod
+    def convertColumn(cls, value: str, index: int, converters: Dict[int, Callable]) -> Union[int, float, bool, str]:
+        converter = converters.get(index, None)
+        if converter is not None:
+            try:
+                return converter(value)
+            except ValueError:
+                pass  # Mixed types on the same column, fall back to a per-value conversion
+
+        res = cls.convert(value)
+        if converter is None and not isinstance(res, str):
+            converters[index] = cls.toBool if isinstance(res, bool) else type(res)
+        return res
 
     @classmethod
     def GetExecutionMeasurements(cls, executionId: int) -> List[str]:
@@ -225,3 +361,42 @@ class InfluxDb:
 
         return res
 
+    @classmethod
+    def GetMeasurementPage(cls, executionId: int, measurement: str, offset: int, limit: int) -> Tuple[List[Dict], int]:
+        """Retrieves up to 'limit' points of the measurement (in time order), starting at 'offset'. Points are
+        returned in columnar form, one entry per tag set: {'tags': {}, 'time': [], 'fields': {name: []}}, with times
+        as microseconds since the epoch. Returns the list of series and the number of retrieved points."""
+        if cls.client is None:
+            cls.initialize()
+
+        reply = cls.client.query(f'show tag keys on "{cls.database}" from "{measurement}"')
+        tags = sorted([t['tagKey'] for t in reply.get_points()])
+
+        reply = cls.client.query(f'SELECT * FROM "{measurement}" WHERE "ExecutionId" = \'{executionId}\' '
+                                 f'ORDER BY time LIMIT {int(limit)} OFFSET {int(offset)}', epoch='u')
+
+        seriesPerTagSet: Dict[Tuple, Dict] = {}
+        count = 0
+        for point in reply.get_points():
+            count += 1
+            tagValues = tuple(point.get(tag, None) for tag in tags)
+            series = seriesPerTagSet.get(tagValues, None)
+            if series is None:
+                series = {'tags': {tag: value for tag, value in zip(tags, tagValues) if value is not None},
+                          'time': [], 'fields': {}}
+                seriesPerTagSet[tagValues] = series
+
+            index = len(series['time'])
+            series['time'].append(point['time'])
+            for key, value in point.items():
+                if key == 'time' or key in tags: continue
+                column = series['fields'].get(key, None)
+                if column is None:
+                    column = series['fields'][key] = [None] * index
+                column.append(value)
+            for column in series['fields'].values():  # Fields missing in this point
+                if len(column) == index:
+                    column.append(None)
+
+        return list(seriesPerTagSet.values()), count
+
@@ -0,0 +1,263 @@
+from threading import Thread, Lock, Condition
+from collections import deque
+from os.path import abspath, join, exists, isfile
+from os import listdir, remove, makedirs, replace
+from time import monotonic, sleep, time
+from typing import Deque, Dict, List, Optional, Tuple
+from influxdb.exceptions import InfluxDBClientError
+from .log import Log
+
+
+class InfluxWriter:
+    """Process-wide write buffer for InfluxDb. Payloads are encoded on the caller thread and written by background
+    threads, retrying with exponential backoff. Items that could not be written after all retries (or that still do
+    not fit in memory after waiting) are spilled to disk and replayed once the database is reachable again. Items
+    rejected by the database (4xx responses) are not retried, but moved to a separate folder for inspection."""
+
+    WORKERS = 2
+    FLUSH_TIMEOUT = 60
+    MAX_BUFFERED_LINES = 1000000
+    RETRIES = 5
+    BACKOFF_BASE = 1  # Seconds, doubled on every retry
+    UNAVAILABLE_TIME = 30  # Seconds to skip write attempts (spilling directly) after exhausting all retries
+    REPLAY_INTERVAL = 30  # Seconds between attempts to replay the spilled items
+    PUT_TIMEOUT = 30  # Seconds to wait for space in the buffer before spilling
+    SPILL_FOLDER = abspath('InfluxSpill')
+    REJECTED_FOLDER = abspath('InfluxRejected')
+
+    condition = Condition()
+    queue: Deque[Tuple[str, List[str]]] = deque()  # (ExecutionId, lines)
+    bufferedLines = 0
+    outstanding: Dict[str, int] = {}  # Items not yet written or spilled, per ExecutionId
+    workers: List[Thread] = []
+    unavailableUntil = 0.0
+    nextReplay = 0.0
+
+    spillLock = Lock()
+    replayLock = Lock()
+    spillCounter = 0
+
+    # Counters
+    Written = Retried = Spilled = Replayed = Rejected = 0
+
+    @classmethod
+    def Initialize(cls):
+        with cls.condition:
+            if len(cls.workers) == 0:
+                for index in range(cls.WORKERS):
+                    worker = Thread(target=cls.workerLoop, name=f'InfluxWriter{index}', daemon=True)
+                    cls.workers.append(worker)
+                    worker.start()
+
+    @classmethod
+    def Put(cls, executionId: Optional[str], lines: List[str]):
+        """Enqueues the lines for writing. If the buffer is full, waits (up to PUT_TIMEOUT) until there is space"""
+        if len(lines) == 0:
+            return
+
+        cls.Initialize()
+        executionId = str(executionId)
+        with cls.condition:
+            def _fits():
+                return cls.bufferedLines == 0 or cls.bufferedLines + len(lines) <= cls.MAX_BUFFERED_LINES
+
+            if not _fits():
+                Log.W(f"InfluxDb write buffer full, waiting for space for {len(lines)} lines")
+                cls.condition.wait_for(_fits, cls.PUT_TIMEOUT)
+            full = not _fits()
+            if not full:
+                cls.queue.append((executionId, lines))
+                cls.bufferedLines += len(lines)
+                cls.outstanding[executionId] = cls.outstanding.get(executionId, 0) + 1
+                cls.condition.notify_all()
+
+        if full:
+            Log.W(f"InfluxDb write buffer full, spilling {len(lines)} lines to disk")
+            cls.spill(executionId, lines)
+
+    @classmethod
+    def Flush(cls, executionId: Optional[str], timeout: float = FLUSH_TIMEOUT) -> bool:
+        """Blocks until all the items enqueued for the execution have been processed. Returns False if the timeout
+        was reached first, or if some of the items are only available on disk (spilled, pending replay)"""
+        executionId = str(executionId)
+        with cls.condition:
+            if not cls.condition.wait_for(lambda: cls.outstanding.get(executionId, 0) == 0, timeout):
+                return False
+        return not cls.hasSpilled(executionId)
+
+    @classmethod
+    def workerLoop(cls):
+        while True:
+            with cls.condition:
+                cls.condition.wait_for(lambda: len(cls.queue) != 0, timeout=cls.REPLAY_INTERVAL)
+                item = cls.queue.popleft() if len(cls.queue) != 0 else None
+
+            if monotonic() >= cls.nextReplay:  # Also under load, so that spilled items are not delayed indefinitely
+                cls.nextReplay = monotonic() + cls.REPLAY_INTERVAL
+                try:
+                    cls.replaySpilled()
+                except Exception as e:
+                    Log.E(f"Unexpected exception while replaying spilled InfluxDb data: {e}")
+
+            if item is None:
+                continue
+
+            executionId, lines = item
+            try:
+                if monotonic() < cls.unavailableUntil:
+                    cls.spill(executionId, lines)
+                else:
+                    written, error = cls.writeWithRetries(lines)
+                    if error is not None:
+                        cls.reject(executionId, lines, error)
+                    elif not written:
+                        cls.spill(executionId, lines)
+            except Exception as e:
+                Log.E(f"Unexpected exception while writing to InfluxDb, spilling {len(lines)} lines: {e}")
+                cls.spill(executionId, lines)
+            finally:
+                with cls.condition:
+                    cls.bufferedLines -= len(lines)
+                    remaining = cls.outstanding.get(executionId, 1) - 1
+                    if remaining > 0:
+                        cls.outstanding[executionId] = remaining
+                    else:
+                        cls.outstanding.pop(executionId, None)
+                    cls.condition.notify_all()
+
+    @classmethod
+    def write(cls, lines: List[str]):
+        from .influx import InfluxDb
+        InfluxDb.WriteLines(lines)
+
+    @staticmethod
+    def isPermanent(e: Exception) -> bool:
+        """True for errors caused by the request itself (e.g. field type conflicts), which will fail again if retried.
+        Timeouts and rate limiting are handled as temporary outages"""
+        code = getattr(e, 'code', None)
+        return (isinstance(e, InfluxDBClientError) and isinstance(code, int)
+                and 400 <= code < 500 and code not in [408, 429])
+
+    @classmethod
+    def writeWithRetries(cls, lines: List[str]) -> Tuple[bool, Optional[Exception]]:
+        """Returns (<written>, <permanent error>)"""
+        delay = cls.BACKOFF_BASE
+        for attempt in range(cls.RETRIES + 1):
+            try:
+                cls.write(lines)
+                cls.Written += len(lines)
+                return True, None
+            except Exception as e:
+                if cls.isPermanent(e):
+                    return False, e
+                if attempt == cls.RETRIES:
+                    Log.E(f"Could not write {len(lines)} lines to InfluxDb after {cls.RETRIES} retries: {e}")
+                    cls.unavailableUntil = monotonic() + cls.UNAVAILABLE_TIME
+                else:
+                    Log.W(f"Exception while writing to InfluxDb, retrying in {delay} seconds: {e}")
+                    cls.Retried += 1
+                    sleep(delay)
+                    delay *= 2
+        return False, None
+
+    @classmethod
+    def spill(cls, executionId: str, lines: List[str]):
+        try:
+            with cls.spillLock:
+                makedirs(cls.SPILL_FOLDER, exist_ok=True)
+                cls.spillCounter += 1
+                path = join(cls.SPILL_FOLDER, f'{int(time() * 1000)}_{cls.spillCounter}_{executionId}.lp')
+                with open(path, 'w', encoding='utf-8') as output:
+                    output.write('\n'.join(lines))
+                cls.Spilled += len(lines)
+        except Exception as e:
+            Log.C(f"Could not spill {len(lines)} InfluxDb lines to disk, the values are lost: {e}")
+
+    @classmethod
+    def reject(cls, executionId: str, lines: List[str], error: Exception):
+        Log.E(f"InfluxDb rejected {len(lines)} lines, not retrying (see '{cls.REJECTED_FOLDER}'): {error}")
+        try:
+            makedirs(cls.REJECTED_FOLDER, exist_ok=True)
+            with cls.spillLock:
+                cls.spillCounter += 1
+                path = join(cls.REJECTED_FOLDER, f'{int(time() * 1000)}_{cls.spillCounter}_{executionId}.lp')
+            with open(path, 'w', encoding='utf-8') as output:
+                output.write('\n'.join(lines))
+        except Exception as e:
+            Log.E(f"Could not save the rejected InfluxDb lines: {e}")
+        cls.Rejected += len(lines)
+
+    @classmethod
+    def quarantine(cls, file: str, reason: str):
+        """Moves a spilled file to the rejected folder, so that it is not replayed again"""
+        Log.E(f"Moving spilled InfluxDb data ({file}) to '{cls.REJECTED_FOLDER}': {reason}")
+        try:
+            makedirs(cls.REJECTED_FOLDER, exist_ok=True)
+            replace(join(cls.SPILL_FOLDER, file), join(cls.REJECTED_FOLDER, file))
+        except Exception as e:
+            Log.E(f"Could not move '{file}': {e}")
+
+    @staticmethod
+    def parseName(file: str) -> Optional[Tuple[int, int, str]]:
+        """Returns (<timestamp>, <counter>, <ExecutionId>) for the names generated by 'spill', None otherwise"""
+        parts = file[:-3].split('_', 2) if file.endswith('.lp') else []
+        if len(parts) != 3 or not parts[0].isdigit() or not parts[1].isdigit():
+            return None
+        return int(parts[0]), int(parts[1]), parts[2]
+
+    @classmethod
+    def hasSpilled(cls, executionId: str) -> bool:
+        try:
+            files = listdir(cls.SPILL_FOLDER) if exists(cls.SPILL_FOLDER) else []
+        except OSError:
+            return False
+        return any((cls.parseName(file) or (0, 0, None))[2] == executionId for file in files)
+
+    @classmethod
+    def replaySpilled(cls):
+        if monotonic() < cls.unavailableUntil or not exists(cls.SPILL_FOLDER):
+            return
+        if not cls.replayLock.acquire(blocking=False):
+            return  # Another worker is replaying
+
+        try:
+            files = []
+            for file in listdir(cls.SPILL_FOLDER):
+                if not isfile(join(cls.SPILL_FOLDER, file)):
+                    continue
+                name = cls.parseName(file)
+                if name is None:
+                    cls.quarantine(file, "Unexpected file name")
+                else:
+                    files.append((name, file))
+
+            for _, file in sorted(files):
+                path = join(cls.SPILL_FOLDER, file)
+                try:
+                    with open(path, 'r', encoding='utf-8') as input:
+                        lines = input.read().splitlines()
+                except Exception as e:
+                    cls.quarantine(file, f"Could not read file: {e}")
+                    continue
+
+                try:
+                    cls.write(lines)
+                except Exception as e:
+                    if cls.isPermanent(e):
+                        cls.quarantine(file, f"Rejected by InfluxDb: {e}")
+                        cls.Rejected += len(lines)
+                        continue
+                    Log.W(f"Could not replay spilled InfluxDb data ({file}), will retry later: {e}")
+                    cls.unavailableUntil = monotonic() + cls.UNAVAILABLE_TIME
+                    return
+
+                remove(path)
+                cls.Replayed += len(lines)
+                Log.I(f"Replayed {len(lines)} spilled lines to InfluxDb ({file})")
+        finally:
+            cls.replayLock.release()
+
+    @classmethod
+    def Counters(cls) -> Dict[str, int]:
+        return {'Written': cls.Written, 'Retried': cls.Retried, 'Spilled': cls.Spilled,
+                'Replayed': cls.Replayed, 'Rejected': cls.Rejected, 'Buffered': cls.bufferedLines}
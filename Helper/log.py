@@ -2,15 +2,20 @@ import logging
 import time
 from logging.handlers import RotatingFileHandler
 from .log_level import Level
+from .log_writer import LogWriter, LogIndex
 from flask import Flask
 from os.path import exists, join
-from os import makedirs
+from os import makedirs, stat
+from bisect import bisect_right
+from collections import OrderedDict
+from threading import Lock
 from Settings import Config
 import traceback
-from typing import Union, Optional, List, Dict, Tuple
+from typing import Union, Optional, List, Dict, Tuple, Iterator, Set
 from dataclasses import dataclass
 from datetime import datetime
 import sys
+import json
 import re
 
 
@@ -61,6 +66,9 @@ class LogEntry:
 
         self.RawString = msg
         msg = msg.strip()
+        if msg.startswith('{') and self.fromJson(msg):
+            return
+
         match = entryParser.match(msg)
         if match:
             self.Date = match.group(1)
@@ -73,6 +81,21 @@ class LogEntry:
             self.Message = msg
             self.Level = _inferLevel(msg)
 
+    def fromJson(self, msg: str) -> bool:
+        """Structured (JSON lines) log. RawString is generated in the same format as the text logs"""
+        try:
+            data = json.loads(msg)
+            self.Timestamp, self.Date, self.Time = data['Timestamp'], data['Date'], data['Time']
+            self.Level, self.Label, self.Message = data['Level'], data['Label'], data['Message']
+        except (ValueError, KeyError, TypeError):
+            return False
+        label = f"{self.Label.replace('.', '||')}||" if self.Label else ''
+        self.RawString = f'{self.Date} {self.Time} - {self.Level.upper()} - {label}{self.Message}\n'
+        return True
+
+    def Matches(self, levels: Optional[Set[str]], label: Optional[str]) -> bool:
+        return LogIndex.Matches(self.Level, self.Label or '', levels, label)
+
     def Serialize(self):
         return {
             'RawString': self.RawString,
@@ -100,11 +123,7 @@ class LogInfo:
     def FromLog(log: List[str]):
         res = LogInfo()
         for line in log:
-            entry = LogEntry(line)
-            level = entry.Level
-            res.Count[level] += 1
-            res.Log.append((level, line))
-            res.Entries.append(entry)
+            res.Append(line)
         return res
 
     @staticmethod
@@ -120,6 +139,27 @@ class LogInfo:
             res.Entries.append(entry)
         return res
 
+    def Append(self, line: str):
+        self.AppendEntry(LogEntry(line))
+
+    def AppendEntry(self, entry: LogEntry):
+        level = entry.Level
+        self.Count[level] += 1
+        self.Log.append((level, entry.RawString))
+        self.Entries.append(entry)
+
+    def Since(self, index: int) -> 'LogInfo':
+        """Returns a new LogInfo with the entries from the selected index. Entries are shared, not copied"""
+        res = LogInfo()
+        res.Log = self.Log[index:]
+        res.Entries = self.Entries[index:]
+        if index == 0:
+            res.Count = dict(self.Count)
+        else:
+            for entry in res.Entries:
+                res.Count[entry.Level] += 1
+        return res
+
     def Serialize(self) -> Dict:
         return {
             "Count": self.Count,
@@ -128,6 +168,37 @@ class LogInfo:
         }
 
 
+class ParsedLog:
+    """Entries of a log file, parsed incrementally as the file grows. Use 'Lock' while updating or reading"""
+
+    def __init__(self):
+        self.Lock = Lock()
+        self.reset()
+
+    def reset(self):
+        self.Size = -1
+        self.MTime = 0.0
+        self.Offset = 0  # Bytes parsed (only complete lines are parsed)
+        self.Ends: List[int] = []  # Offset after the end of each entry, used as cursor
+        self.Info = LogInfo()
+
+    def Update(self, file: str):
+        info = stat(file)
+        if info.st_size == self.Size and info.st_mtime == self.MTime:
+            return
+        if info.st_size < self.Offset:  # Truncated or replaced, parse again
+            self.reset()
+
+        for end, line in Log.ReadLines(file, self.Offset):
+            self.Info.Append(line)
+            self.Ends.append(end)
+            self.Offset = end
+        self.Size, self.MTime = info.st_size, info.st_mtime
+
+    def Since(self, cursor: int) -> Tuple[LogInfo, int]:
+        return self.Info.Since(bisect_right(self.Ends, cursor)), self.Offset
+
+
 class Log:
     CONSOLE_FORMAT = '%(asctime)s %(levelname)s: %(message)s'
     FILE_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
@@ -136,9 +207,16 @@ class Log:
     LOG_SIZE = 16777216
     LOG_COUNT = 10
 
+    # Parsed log files cache
+    MAX_CACHED_BYTES = 64 * 1024 * 1024  # Total size of the cached log files (parsed entries use several times more)
+    TAIL_BLOCK = 65536
+
     initialized = False
     app: Flask = None
 
+    cacheLock = Lock()
+    cache: 'OrderedDict[str, ParsedLog]' = OrderedDict()  # Least recently used first
+
     @classmethod
     def Initialize(cls, app: Flask):
         config = Config()
@@ -195,6 +273,16 @@ class Log:
     @classmethod
     def C(cls, msg, logger: Optional[str] = None): cls._dump('CRITICAL', msg, logger)
 
+    @classmethod
+    def IsEnabled(cls, level: Union[Level, str]) -> bool:
+        """Returns True if messages of this level are stored or displayed (on the main log), so that expensive messages
+        can be skipped entirely otherwise"""
+        if not cls.initialized:
+            return True
+        name = level if isinstance(level, str) else level.name
+        minimum = min((handler.level for handler in cls.app.logger.handlers), default=logging.NOTSET)
+        return logging.getLevelName(name) >= minimum
+
     @staticmethod
     def State(condition: bool) -> str:
         return f'{"En" if condition else "Dis"}abled'
@@ -228,37 +316,118 @@ class Log:
         logger = logging.getLogger(identifier)
         logger.setLevel(logging.DEBUG)
 
-        fileHandler = logging.FileHandler(filename=filePath, mode='a+', encoding='utf-8')
-        fileHandler.setFormatter(logging.Formatter(cls.FILE_FORMAT))
-        fileHandler.setLevel(logging.DEBUG)
-
-        logger.addHandler(fileHandler)
+        # Records are written by a background thread (see LogWriter)
+        structured = Config().Logging.Format == 'Json'
+        logger.addHandler(LogWriter.Open(identifier, filePath, structured, logging.Formatter(cls.FILE_FORMAT)))
         Log.D('[File Opened]', identifier)
         return filePath
 
     @classmethod
     def CloseLogFile(cls, identifier):
+        """Returns once all the messages of the logger have been written"""
         Log.D('[Closing File]', identifier)
         logger = logging.getLogger(identifier)
-        for handler in logger.handlers:  # type: logging.Handler
+        for handler in list(logger.handlers):  # type: logging.Handler
             logger.removeHandler(handler)
-            handler.flush()
-            handler.close()
+        if not LogWriter.Close(identifier):
+            Log.W(f'Timeout while waiting for log file {identifier} to be written')
 
     @classmethod
     def RetrieveLog(cls, file: str = None, tail: Optional[int] = None) -> List[str]:
-        res = []
         file = join(Config().Logging.Folder, 'Scheduler.log') if file is None else file
+        if tail is not None:
+            return cls.TailLines(file, tail)
+
+        res = []
         with open(file, 'rb') as log:
             for line in log:
                 res.append(line.decode(encoding='utf-8', errors='replace'))
+        return res
 
-        if tail is not None and tail < len(res):
-            start = len(res) - tail
-            return res[start:len(res)]
+    @classmethod
+    def RetrieveLogInfo(cls, file: str = None, tail: Optional[int] = None) -> LogInfo:
+        if tail is not None:
+            return LogInfo.FromLog(cls.RetrieveLog(file, tail))
+        return cls.RetrieveLogInfoSince(file, 0)[0]
+
+    @classmethod
+    def RetrieveLogInfoSince(cls, file: str = None, cursor: int = 0) -> Tuple[LogInfo, int]:
+        """Returns the entries added to the log after the cursor, along with the cursor for the next call. Parsed
+        entries are cached, so that only the lines written since the previous call are read and parsed."""
+        file = join(Config().Logging.Folder, 'Scheduler.log') if file is None else file
+        with cls.cacheLock:
+            parsed = cls.cache.pop(file, None) or ParsedLog()
+            cls.cache[file] = parsed
+
+        with parsed.Lock:  # Parsing a large log does not block the requests for other logs
+            parsed.Update(file)
+            res = parsed.Since(cursor)
+
+        with cls.cacheLock:
+            total = sum(log.Offset for log in cls.cache.values())
+            while total > cls.MAX_CACHED_BYTES and len(cls.cache) != 0:
+                _, evicted = cls.cache.popitem(last=False)  # Includes this log if it is too large on its own
+                total -= evicted.Offset
         return res
 
     @classmethod
-    def RetrieveLogInfo(cls, file:str = None, tail: Optional[int] = None) -> LogInfo:
-        log = cls.RetrieveLog(file, tail)
-        return LogInfo.FromLog(log)
+    def RetrieveFilteredLogInfo(cls, file: str, cursor: int = 0, levels: Optional[Set[str]] = None,
+                                label: Optional[str] = None) -> Tuple[LogInfo, int]:
+        """As RetrieveLogInfoSince, but returns only the entries of the selected levels (capitalized, e.g. 'Error')
+        and label (including sub-labels, e.g. 'Task_1' includes 'Task_1.Seq1'). If the log has an index only the
+        matching sections of the file are read and parsed."""
+        segments = LogIndex.Load(file)
+        if segments is None:  # Not indexed (older logs or main log)
+            info, cursor = cls.RetrieveLogInfoSince(file, cursor)
+            res = LogInfo()
+            for entry in info.Entries:
+                if entry.Matches(levels, label):
+                    res.AppendEntry(entry)
+            return res, cursor
+
+        res = LogInfo()
+        with open(file, 'rb') as log:
+            for start, end, level, segmentLabel in segments:
+                if end > cursor and LogIndex.Matches(level, segmentLabel, levels, label):
+                    log.seek(max(start, cursor))
+                    for line in log.read(end - max(start, cursor)).splitlines(keepends=True):
+                        res.Append(line.decode(encoding='utf-8', errors='replace'))
+                cursor = max(cursor, end)
+
+        for end, line in cls.ReadLines(file, cursor):  # Written after the last index update
+            entry = LogEntry(line)
+            if entry.Matches(levels, label):
+                res.AppendEntry(entry)
+            cursor = end
+        return res, cursor
+
+    @staticmethod
+    def ReadLines(file: str, offset: int = 0) -> Iterator[Tuple[int, str]]:
+        """Yields the complete lines of the file after 'offset', as (<offset after the line>, <decoded line>)"""
+        with open(file, 'rb') as log:
+            log.seek(offset)
+            for line in log:
+                if not line.endswith(b'\n'):
+                    return  # Still being written
+                offset += len(line)
+                yield offset, line.decode(encoding='utf-8', errors='replace')
+
+    @classmethod
+    def TailLines(cls, file: str, count: int) -> List[str]:
+        """Returns the last 'count' lines of the file, reading backwards only as much as needed"""
+        if count <= 0:
+            return []
+
+        with open(file, 'rb') as log:
+            position = log.seek(0, 2)
+            data = b''
+            while position > 0 and data.count(b'\n') <= count:
+                size = min(cls.TAIL_BLOCK, position)
+                position -= size
+                log.seek(position)
+                data = log.read(size) + data
+
+        lines = data.splitlines(keepends=True)
+        if position > 0:
+            lines = lines[1:]  # First line may be incomplete
+        return [line.decode(encoding='utf-8', errors='replace') for line in lines[-count:]]
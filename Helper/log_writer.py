@@ -0,0 +1,197 @@
+import logging
+import json
+import atexit
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue, Empty
+from threading import Lock, Event
+from time import monotonic
+from os.path import exists
+from typing import Dict, List, Optional, Tuple, Set
+
+Segment = Tuple[int, int, str, str]  # (<start offset>, <end offset>, <level>, <label>)
+
+
+class LogIndex:
+    """Companion of a log file (<log>.idx). Each line describes a range of the log that contains only entries of
+    the same level and label, so that filtered views can be generated without parsing the complete log"""
+
+    EXTENSION = '.idx'
+
+    @classmethod
+    def PathFor(cls, logFile: str) -> str:
+        return f'{logFile}{cls.EXTENSION}'
+
+    @staticmethod
+    def SplitLabel(message: str) -> Tuple[str, str]:
+        """Returns (<label>, <message>), where the label is the 'Task||' prefix, using '.' as separator (as in
+        LogEntry)"""
+        label, separator, message = message.rpartition('||')
+        return (label.replace('||', '.'), message) if separator else ('', message)
+
+    @staticmethod
+    def Matches(level: str, label: str, levels: Optional[Set[str]], selected: Optional[str]) -> bool:
+        return ((levels is None or level in levels) and
+                (selected is None or label == selected or label.startswith(f'{selected}.')))
+
+    @classmethod
+    def Load(cls, logFile: str) -> Optional[List[Segment]]:
+        """Returns the ranges indexed until now, or None if the log has no index"""
+        path = cls.PathFor(logFile)
+        if not exists(path):
+            return None
+
+        segments = []
+        with open(path, 'r', encoding='utf-8') as index:
+            for line in index:
+                try:
+                    start, end, level, label = json.loads(line)
+                    segments.append((start, end, level, label))
+                except ValueError:
+                    break  # Still being written
+        return segments
+
+
+class LogFileWriter:
+    """Output of a single logger: log file and index"""
+
+    def __init__(self, path: str, structured: bool, formatter: logging.Formatter):
+        self.Path = path
+        self.Structured = structured
+        self.formatter = formatter
+        self.output = open(path, 'ab')
+        self.index = open(LogIndex.PathFor(path), 'a', encoding='utf-8')
+        self.offset = self.output.tell()
+        self.segment: Optional[List] = None  # Range that is still being extended
+        self.dirty = False
+
+    def Write(self, record: logging.LogRecord):
+        label, message = LogIndex.SplitLabel(record.getMessage())
+        level = record.levelname.capitalize()
+        if self.Structured:
+            date, time = self.formatter.formatTime(record).split(' ')
+            line = json.dumps({'Timestamp': int(record.created * 1000), 'Date': date, 'Time': time,
+                               'Level': level, 'Label': label, 'Message': message})
+        else:
+            line = self.formatter.format(record)
+        data = f'{line}\n'.encode('utf-8', errors='replace')
+
+        start = self.offset
+        self.output.write(data)
+        self.offset += len(data)
+        if self.segment is not None and self.segment[2] == level and self.segment[3] == label:
+            self.segment[1] = self.offset
+        else:
+            self.closeSegment()
+            self.segment = [start, self.offset, level, label]
+        self.dirty = True
+
+    def Flush(self):
+        if self.dirty:
+            self.output.flush()  # Before the index, which must not point beyond the written data
+            self.closeSegment()
+            self.index.flush()
+            self.dirty = False
+
+    def Close(self):
+        self.Flush()
+        self.output.close()
+        self.index.close()
+
+    def closeSegment(self):
+        if self.segment is not None:
+            self.index.write(json.dumps(self.segment) + '\n')
+            self.segment = None
+
+
+class RecordQueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record  # Formatted by the writer, the records are not shared with other handlers
+
+
+class BatchListener(QueueListener):
+    IDLE = object()  # Returned when nothing is received during the flush interval
+
+    def dequeue(self, block: bool):
+        try:
+            return self.queue.get(block, timeout=LogWriter.FLUSH_INTERVAL)
+        except Empty:
+            return self.IDLE
+
+
+class CloseRequest:
+    def __init__(self, identifier: str):
+        self.Identifier = identifier
+        self.Done = Event()
+
+
+class LogWriter(logging.Handler):
+    """Writes the per-execution log files (see Log.OpenLogFile) from a single background thread. The loggers only
+    enqueue their records, and the files are flushed periodically, so that bursts of messages (for example, the output
+    of a chatty command) are written in batches"""
+
+    CLOSE_TIMEOUT = 30  # Seconds to wait for the pending records of a file when closing it
+    FLUSH_INTERVAL = 0.25  # Maximum time (seconds) before written records are visible in the files
+
+    filesLock = Lock()  # Not 'lock', used by logging.Handler
+    queue: SimpleQueue = SimpleQueue()
+    queueHandler: Optional[QueueHandler] = None
+    listener: Optional[QueueListener] = None
+    files: Dict[str, LogFileWriter] = {}
+    lastFlush = 0.0
+
+    @classmethod
+    def Open(cls, identifier: str, path: str, structured: bool, formatter: logging.Formatter) -> QueueHandler:
+        """Starts writing the records of the logger to the file. Returns the handler to add to the logger"""
+        with cls.filesLock:
+            if cls.listener is None:
+                cls.queueHandler = RecordQueueHandler(cls.queue)
+                cls.listener = BatchListener(cls.queue, LogWriter())
+                cls.listener.start()
+                atexit.register(cls.Stop)
+            cls.files[identifier] = LogFileWriter(path, structured, formatter)
+            return cls.queueHandler
+
+    @classmethod
+    def Close(cls, identifier: str) -> bool:
+        """Waits until the records enqueued for the file are written, then closes it"""
+        if cls.listener is None:
+            return False
+        request = CloseRequest(identifier)
+        cls.queue.put(request)
+        return request.Done.wait(cls.CLOSE_TIMEOUT)
+
+    @classmethod
+    def Stop(cls):
+        with cls.filesLock:
+            listener, cls.listener = cls.listener, None
+        if listener is not None:
+            listener.stop()  # Processes the pending records (the writer may need the lock)
+        with cls.filesLock:
+            for file in cls.files.values():
+                file.Close()
+            cls.files.clear()
+
+    def emit(self, record: logging.LogRecord):
+        if record is BatchListener.IDLE:
+            pass
+        elif isinstance(record, CloseRequest):
+            with self.filesLock:
+                file = self.files.pop(record.Identifier, None)
+            try:
+                if file is not None:
+                    file.Close()
+            finally:
+                record.Done.set()
+        else:
+            try:
+                file = self.files.get(record.name, None)
+                if file is not None:
+                    file.Write(record)
+            except Exception:
+                self.handleError(record)
+
+        now = monotonic()
+        if record is BatchListener.IDLE or now - self.lastFlush >= self.FLUSH_INTERVAL:
+            for file in list(self.files.values()):
+                file.Flush()
+            LogWriter.lastFlush = now
@@ -0,0 +1,98 @@
+from threading import Lock
+from bisect import bisect_left
+from typing import Dict, List, Tuple, Optional
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.Buckets = buckets
+        self.Counts = [0] * (len(buckets) + 1)  # Last one is +Inf
+        self.Sum = 0.0
+        self.Count = 0
+
+    def Observe(self, value: float):
+        self.Counts[bisect_left(self.Buckets, value)] += 1
+        self.Sum += value
+        self.Count += 1
+
+
+class Metrics:
+    """Process-wide counters, gauges and histograms, exported in the Prometheus text format (see '/metrics').
+    Metric names follow the Prometheus conventions (base units, '_total' suffix for counters)"""
+
+    BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 3600.0)
+
+    lock = Lock()
+    counters: Dict[str, Dict[Labels, float]] = {}
+    gauges: Dict[str, Dict[Labels, float]] = {}
+    histograms: Dict[str, Dict[Labels, Histogram]] = {}
+
+    @staticmethod
+    def labels(values: Dict[str, object]) -> Labels:
+        return tuple(sorted((key, str(value)) for key, value in values.items()))
+
+    @classmethod
+    def Increment(cls, name: str, value: float = 1, **labels):
+        key = cls.labels(labels)
+        with cls.lock:
+            series = cls.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    @classmethod
+    def Set(cls, name: str, value: float, **labels):
+        with cls.lock:
+            cls.gauges.setdefault(name, {})[cls.labels(labels)] = value
+
+    @classmethod
+    def Observe(cls, name: str, value: float, **labels):
+        key = cls.labels(labels)
+        with cls.lock:
+            series = cls.histograms.setdefault(name, {})
+            histogram = series.get(key, None)
+            if histogram is None:
+                histogram = series[key] = Histogram(cls.BUCKETS)
+            histogram.Observe(value)
+
+    @classmethod
+    def Reset(cls):
+        with cls.lock:
+            cls.counters.clear()
+            cls.gauges.clear()
+            cls.histograms.clear()
+
+    @classmethod
+    def Render(cls) -> str:
+        lines: List[str] = []
+        with cls.lock:
+            for kind, collection in [('counter', cls.counters), ('gauge', cls.gauges)]:
+                for name in sorted(collection.keys()):
+                    lines.append(f'# TYPE {name} {kind}')
+                    for labels, value in sorted(collection[name].items()):
+                        lines.append(f'{name}{cls.format(labels)} {cls.number(value)}')
+
+            for name in sorted(cls.histograms.keys()):
+                lines.append(f'# TYPE {name} histogram')
+                for labels, histogram in sorted(cls.histograms[name].items(), key=lambda item: item[0]):
+                    accumulated = 0
+                    for bound, count in zip([*histogram.Buckets, None], histogram.Counts):
+                        accumulated += count
+                        le = '+Inf' if bound is None else cls.number(bound)
+                        lines.append(f'{name}_bucket{cls.format(labels, le)} {accumulated}')
+                    lines.append(f'{name}_sum{cls.format(labels)} {cls.number(histogram.Sum)}')
+                    lines.append(f'{name}_count{cls.format(labels)} {histogram.Count}')
+        lines.append('')
+        return '\n'.join(lines)
+
+    @staticmethod
+    def format(labels: Labels, le: Optional[str] = None) -> str:
+        pairs = [*labels, ('le', le)] if le is not None else labels
+        if len(pairs) == 0:
+            return ''
+        escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+        return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + '}'
+
+    @staticmethod
+    def number(value: float) -> str:
+        return repr(float(value)) if not float(value).is_integer() else str(int(value))
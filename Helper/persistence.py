@@ -0,0 +1,159 @@
+from os.path import abspath, join, dirname, getmtime
+from os import makedirs
+from threading import Lock
+from typing import Dict, List, Optional, Iterable, Tuple
+import sqlite3
+import json
+from time import time_ns
+from .serialize import Serialize
+
+
+class PersistenceBackend:
+    """Storage for serialized executions ('Execution' kind) and their stages ('PreRunner', 'Executor' and 'PostRunner'
+    kinds), identified by execution id"""
+
+    KINDS = ['Execution', 'PreRunner', 'Executor', 'PostRunner']
+
+    def Save(self, kind: str, id: int, data: Dict):
+        raise NotImplementedError()
+
+    def SaveAll(self, kind: str, items: Iterable[Tuple[int, Dict]]):
+        for id, data in items:
+            self.Save(kind, id, data)
+
+    def Load(self, kind: str, id: int) -> Dict:
+        """Raises KeyError if the item does not exist"""
+        raise NotImplementedError()
+
+    def Modified(self, kind: str, id: int) -> Optional[int]:
+        """Returns a value that changes every time the item is saved, or None if the item does not exist"""
+        raise NotImplementedError()
+
+    def Ids(self, kind: str, offset: int = 0, limit: Optional[int] = None) -> List[int]:
+        """Returns the stored ids, highest (most recent) first"""
+        raise NotImplementedError()
+
+    def Count(self, kind: str) -> int:
+        raise NotImplementedError()
+
+
+class YamlBackend(PersistenceBackend):
+    """One YAML file per item, in a sub-folder per kind"""
+
+    def Save(self, kind: str, id: int, data: Dict):
+        Serialize.Save(data, Serialize.Path(kind, str(id)))
+
+    def Load(self, kind: str, id: int) -> Dict:
+        try:
+            return Serialize.Load(Serialize.Path(kind, str(id)))
+        except FileNotFoundError:
+            raise KeyError(f"{kind} {id} not found")
+
+    def Modified(self, kind: str, id: int) -> Optional[int]:
+        try:
+            return int(getmtime(Serialize.Path(kind, str(id))) * 1e9)
+        except OSError:
+            return None
+
+    def Ids(self, kind: str, offset: int = 0, limit: Optional[int] = None) -> List[int]:
+        ids = sorted((int(i) for i in Serialize.List(False, False, kind)), reverse=True)
+        return ids[offset:] if limit is None else ids[offset:offset + limit]
+
+    def Count(self, kind: str) -> int:
+        return len(Serialize.List(False, False, kind))
+
+
+class SqliteBackend(PersistenceBackend):
+    """Single SQLite database, items are stored as JSON"""
+
+    FILENAME = 'persistence.sqlite'
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = abspath(join(Serialize.BASE, self.FILENAME)) if path is None else path
+        self.lock = Lock()
+        makedirs(dirname(self.path), exist_ok=True)
+        self.connection = sqlite3.connect(self.path, check_same_thread=False)
+        with self.lock, self.connection:
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            self.connection.execute('CREATE TABLE IF NOT EXISTS items '
+                                    '(kind TEXT NOT NULL, id INTEGER NOT NULL, data TEXT NOT NULL, '
+                                    'modified INTEGER NOT NULL DEFAULT 0, PRIMARY KEY (kind, id))')
+
+    def Save(self, kind: str, id: int, data: Dict):
+        self.SaveAll(kind, [(id, data)])
+
+    def SaveAll(self, kind: str, items: Iterable[Tuple[int, Dict]]):
+        """Saves all the items in a single transaction"""
+        with self.lock, self.connection:
+            self.connection.executemany('INSERT OR REPLACE INTO items (kind, id, data, modified) VALUES (?, ?, ?, ?)',
+                                        ((kind, int(id), json.dumps(data, separators=(',', ':')), time_ns())
+                                         for id, data in items))
+
+    def Load(self, kind: str, id: int) -> Dict:
+        with self.lock:
+            row = self.connection.execute('SELECT data FROM items WHERE kind = ? AND id = ?',
+                                          (kind, int(id))).fetchone()
+        if row is None:
+            raise KeyError(f"{kind} {id} not found")
+        return json.loads(row[0])
+
+    def Modified(self, kind: str, id: int) -> Optional[int]:
+        with self.lock:
+            row = self.connection.execute('SELECT modified FROM items WHERE kind = ? AND id = ?',
+                                          (kind, int(id))).fetchone()
+        return None if row is None else row[0]
+
+    def Ids(self, kind: str, offset: int = 0, limit: Optional[int] = None) -> List[int]:
+        with self.lock:
+            rows = self.connection.execute('SELECT id FROM items WHERE kind = ? ORDER BY id DESC LIMIT ? OFFSET ?',
+                                           (kind, -1 if limit is None else limit, offset)).fetchall()
+        return [row[0] for row in rows]
+
+    def Count(self, kind: str) -> int:
+        with self.lock:
+            return self.connection.execute('SELECT COUNT(*) FROM items WHERE kind = ?', (kind,)).fetchone()[0]
+
+
+class Persistence:
+    BACKENDS = {'Yaml': YamlBackend, 'Sqlite': SqliteBackend}
+
+    lock = Lock()
+    backend: Optional[PersistenceBackend] = None
+
+    @classmethod
+    def Backend(cls) -> PersistenceBackend:
+        with cls.lock:
+            if cls.backend is None:
+                from Settings import Config
+                cls.backend = cls.BACKENDS[Config().Persistence]()
+            return cls.backend
+
+    @classmethod
+    def Save(cls, kind: str, id: int, data: Dict):
+        cls.Backend().Save(kind, id, data)
+
+    @classmethod
+    def Load(cls, kind: str, id: int) -> Dict:
+        return cls.Backend().Load(kind, id)
+
+    @classmethod
+    def Modified(cls, kind: str, id: int) -> Optional[int]:
+        return cls.Backend().Modified(kind, id)
+
+    @classmethod
+    def Ids(cls, kind: str, offset: int = 0, limit: Optional[int] = None) -> List[int]:
+        return cls.Backend().Ids(kind, offset, limit)
+
+    @classmethod
+    def Count(cls, kind: str) -> int:
+        return cls.Backend().Count(kind)
+
+    @staticmethod
+    def Migrate(source: PersistenceBackend, target: PersistenceBackend) -> Dict[str, int]:
+        """Copies all the items from one backend to another. Returns the number of items copied per kind"""
+        res = {}
+        for kind in PersistenceBackend.KINDS:
+            ids = source.Ids(kind)
+            target.SaveAll(kind, ((id, source.Load(kind, id)) for id in ids))
+            res[kind] = len(ids)
+        return res
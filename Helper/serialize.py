@@ -1,5 +1,6 @@
-from os.path import join, abspath, exists, dirname, isdir, isfile
-from os import makedirs, listdir
+from os.path import join, abspath, exists, dirname, isdir, isfile, basename
+from os import makedirs, listdir, replace, remove, chmod, stat, umask
+from tempfile import mkstemp
 import yaml
 from typing import Dict, Optional, List as _List, Tuple, Union
 from datetime import datetime
@@ -8,6 +9,9 @@ from datetime import datetime
 class Serialize:
     BASE = 'Persistence'
     FORMAT = '%a %b %d %H:%M:%S %Y'
+    LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)  # Use the LibYAML bindings if available
+    UMASK = umask(0o022)  # umask can only be read by setting it, restored immediately
+    umask(UMASK)
 
     @classmethod
     def Path(cls, *args: str):
@@ -21,7 +25,7 @@ class Serialize:
         if not exists(abspath(path)): return []
         items = [i for i in listdir(path)]
         filter = isdir if folders else isfile
-        filtered = [i for i in items if filter(join(path, i))]
+        filtered = [i for i in items if filter(join(path, i)) and (folders or i.endswith('.yml'))]
         if fullPath:
             return [abspath(join(path, i)) for i in filtered]
         else:
@@ -29,15 +33,26 @@ class Serialize:
 
     @classmethod
     def Save(cls, data, path):
+        """Writes to a temporary file that then replaces the original, so that the file is never left incomplete"""
         if not exists(dirname(path)): makedirs(dirname(path), exist_ok=True)
 
-        with open(path, 'w', encoding='utf-8') as out:
-            yaml.safe_dump(data, out, default_flow_style=False, allow_unicode=True)
+        # Unique name, the same item may be saved by several threads at once (e.g. HeartBeat and finalization)
+        handle, temp = mkstemp(suffix='.part', prefix=f'{basename(path)}.', dir=dirname(path))
+        try:
+            with open(handle, 'w', encoding='utf-8') as out:
+                yaml.safe_dump(data, out, default_flow_style=False, allow_unicode=True)
+            # mkstemp always creates the file as 0600, keep the mode of the original file (or the one of a new file)
+            chmod(temp, stat(path).st_mode & 0o7777 if exists(path) else 0o666 & ~cls.UMASK)
+            replace(temp, path)
+        except Exception:
+            if exists(temp):
+                remove(temp)
+            raise
 
     @classmethod
     def Load(cls, path) -> Dict:
         with open(path, 'r', encoding='utf-8') as input:
-            return yaml.safe_load(input)
+            return yaml.load(input, Loader=cls.LOADER)
 
     @classmethod
     def DateToString(cls, date) -> Optional[str]:
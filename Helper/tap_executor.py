@@ -1,7 +1,7 @@
 import subprocess
 import psutil
 import re
-from Helper import Level
+from Helper import Level, CancellationToken
 from Settings import Config, TapConfig
 from typing import Dict, Optional, Callable
 from time import sleep
@@ -18,7 +18,8 @@ class Tap:
         cls.closingRegex = re.compile(r'.*Resource ".*" closed.*')
         cls.initialized = True
 
-    def __init__(self, tapPlan: str, externals: Dict[str, str], logger: Callable):
+    def __init__(self, tapPlan: str, externals: Dict[str, str], logger: Callable,
+                 cancellation: Optional[CancellationToken] = None):
         if not self.initialized:
             self.Initialize()
 
@@ -26,6 +27,7 @@ class Tap:
         self.externals = externals
         self.args = self.getArgs(tapPlan, externals)
         self.logger = logger
+        self.cancellation = cancellation
         self.closedInstruments = 0
         self.closeStarted = False
         self.process: Optional[psutil.Process] = None
@@ -59,12 +61,21 @@ class Tap:
                                    stderr=subprocess.STDOUT, cwd=Tap.tapConfig.Folder)
         sleep(0.5)  # Give some time to ensure that psutil finds the process
         self.process = psutil.Process(process.pid)
-        self.tap_stdout(process)
-
-        exitCode = process.wait()
+        handle = None if self.cancellation is None else self.cancellation.Register(self.terminate)
+        try:
+            self.tap_stdout(process)
+            exitCode = process.wait()
+        finally:
+            if handle is not None:
+                self.cancellation.Unregister(handle)
 
         return exitCode
 
+    def terminate(self):
+        if self.process.is_running():
+            self.logger(Level.WARNING, "[TAP]Execution cancelled, stopping TAP process tree")
+            Tap.endProcessTree(self.process)
+
     def tap_stdout(self, process: subprocess.Popen):
         _levels = [('Debug', Level.DEBUG), ('Information', Level.INFO),
                    ('Warning', Level.WARNING), ('Error', Level.ERROR)]
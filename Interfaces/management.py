@@ -1,13 +1,23 @@
 from REST import RestClient
 from Helper import Log
 from Settings import Config
-from typing import Dict, Optional, Tuple, List
+from typing import Dict, Optional, Tuple, List, Callable
 from Data import Metal, MetalUsage, NsInfo
 from Facility import Facility
+from threading import Lock
+from time import monotonic
 
 
 class Management:
+    VIM_RESOURCES_TTL = 30  # Seconds
+    METADATA_TTL = 300  # Seconds, for information that rarely changes (VIM locations, NSDs)
+
     sliceManager = None
+    vimLock = Lock()
+    vimResources: Optional[Dict[str, MetalUsage]] = None
+    vimResourcesRetrieved = 0.0
+    metadataLock = Lock()
+    metadata: Dict[str, Tuple[float, int, object]] = {}  # Name: (<retrieved>, <facility version>, <value>)
 
     @classmethod
     def HasResources(cls, owner: 'ExecutorBase', localResources: List[str],
@@ -21,7 +31,7 @@ class Management:
 
         if len(networkServices) != 0:
             try:
-                vimResources = cls.SliceManager().GetVimResources()
+                vimResources = cls.VimResources()
             except Exception as e:
                 Log.E(f"Exception while retrieving VIM resources: {e}")
                 return False, True
@@ -46,7 +56,73 @@ class Management:
                 if required.Cpu > current.Cpu or required.Ram > current.Ram or required.Disk > current.Disk:
                     return False, True  # Execution possible, but not enough resources at the moment
 
-        return Facility.TryLockResources(localResources, owner, exclusive), True
+        locked = Facility.TryLockResources(localResources, owner, exclusive)
+        if locked and len(networkServices) != 0:
+            cls.InvalidateVimResources()  # The network services are about to be deployed
+        return locked, True
+
+    @classmethod
+    def VimResources(cls) -> Dict[str, MetalUsage]:
+        """Returns the VIM resources reported by the Slice Manager, cached for VIM_RESOURCES_TTL seconds. Empty values
+        (retrieval errors) are not cached"""
+        with cls.vimLock:
+            if cls.vimResources is None or monotonic() - cls.vimResourcesRetrieved > cls.VIM_RESOURCES_TTL:
+                resources = cls.SliceManager().GetVimResources()
+                if len(resources) == 0:
+                    cls.vimResources = None
+                    return resources
+                cls.vimResources = resources
+                cls.vimResourcesRetrieved = monotonic()
+            return cls.vimResources
+
+    @classmethod
+    def InvalidateVimResources(cls):
+        with cls.vimLock:
+            cls.vimResources = None
+
+    @classmethod
+    def cachedMetadata(cls, name: str, factory: Callable[[], Dict], refresh: bool = False) -> Dict:
+        """Returns the cached value, retrieving it again if expired, if the facility has been reloaded or if a refresh
+        is requested. Empty values (retrieval errors) are not cached"""
+        with cls.metadataLock:
+            entry = cls.metadata.get(name, None)
+            if entry is not None and not refresh:
+                retrieved, version, value = entry
+                if monotonic() - retrieved <= cls.METADATA_TTL and version == Facility.Version:
+                    return value
+
+        value = factory()
+        with cls.metadataLock:
+            if len(value) != 0:
+                cls.metadata[name] = (monotonic(), Facility.Version, value)
+            else:
+                cls.metadata.pop(name, None)
+        return value
+
+    @classmethod
+    def InvalidateMetadata(cls):
+        with cls.metadataLock:
+            cls.metadata.clear()
+
+    @classmethod
+    def GetVimLocation(cls, vimName: str) -> Optional[str]:
+        mapping = cls.cachedMetadata('VimLocations', lambda: cls.SliceManager().GetVimNameToLocationMapping())
+        if vimName not in mapping:  # Possibly added after the last retrieval
+            mapping = cls.cachedMetadata('VimLocations', lambda: cls.SliceManager().GetVimNameToLocationMapping(),
+                                         refresh=True)
+        return mapping.get(vimName, None)
+
+    @classmethod
+    def GetNsdData(cls, nsd: str) -> Tuple[Optional[str], Optional[str], Optional[Metal]]:
+        """Same as SliceManager.GetNsdData, using a cached list of NSDs"""
+        try:
+            nsds = cls.cachedMetadata('Nsds', lambda: cls.SliceManager().GetNsdInfo())
+            if nsd not in nsds:  # Possibly onboarded after the last retrieval
+                nsds = cls.cachedMetadata('Nsds', lambda: cls.SliceManager().GetNsdInfo(), refresh=True)
+        except Exception as e:
+            Log.E(f"Exception while retrieving NSD information: {e}")
+            return None, None, None
+        return cls.SliceManager().GetNsdData(nsd, nsds)
 
     @classmethod
     def ReleaseLocalResources(cls, owner: 'ExecutorBase', localResources: List[str]):
@@ -137,10 +213,12 @@ class SliceManager(RestClient):
 
         return allNsds if nsdName is None else allNsds[nsdName]
 
-    def GetNsdData(self, nsd: str) -> Tuple[Optional[str], Optional[str], Optional[Metal]]:
-        """Returns (nsd_name, nsd_id, requirements (as Metal))"""
+    def GetNsdData(self, nsd: str,
+                   allNsds: Optional[Dict] = None) -> Tuple[Optional[str], Optional[str], Optional[Metal]]:
+        """Returns (nsd_name, nsd_id, requirements (as Metal)). If not provided, the list of NSDs (see GetNsdInfo)
+        is retrieved from the Slice Manager"""
         try:
-            data = self.GetNsdInfo(nsd)
+            data = self.GetNsdInfo(nsd) if allNsds is None else allNsds[nsd]
             if isinstance(data, list):
                 if len(data) != 0:
                     data = data[0]
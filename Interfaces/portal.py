@@ -1,35 +1,125 @@
 from REST import RestClient
 import json
-from threading import Thread
-from typing import Optional, Union
+from threading import Thread, Lock, Event
+from typing import Optional, Union, Dict, List, Tuple
+from Helper import Log
 from Settings.config import Portal as PortalConfig
 
 
+class PendingUpdate:
+    MAX_MESSAGES = 100  # Older messages are dropped if the Portal cannot keep up
+
+    def __init__(self):
+        self.Status: Optional[str] = None
+        self.Dashboard: Optional[str] = None
+        self.PerCent: Optional[int] = None
+        self.Messages: List[str] = []
+
+    def Merge(self, status: Optional[str], dashboardUrl: Optional[str],
+              percent: Optional[int], message: Optional[str]) -> int:
+        """Last status, dashboard and percent win, messages are appended. Returns the number of dropped messages"""
+        if status is not None: self.Status = status
+        if dashboardUrl is not None: self.Dashboard = dashboardUrl
+        if percent is not None: self.PerCent = percent
+        if message is not None: self.Messages.append(message)
+
+        dropped = max(0, len(self.Messages) - self.MAX_MESSAGES)
+        if dropped != 0:
+            self.Messages = self.Messages[dropped:]
+        return dropped
+
+    @property
+    def Payloads(self) -> List[Dict[str, Union[str, int]]]:
+        """One payload per message (as expected by the Portal). Status, dashboard and percent are sent with the last
+        one, or alone if there are no messages"""
+        payloads: List[Dict[str, Union[str, int]]] = [{'Message': message} for message in self.Messages[:-1]]
+        last = {}
+        for key, value in [('Status', self.Status), ('Dashboard', self.Dashboard), ('PerCent', self.PerCent),
+                           ('Message', self.Messages[-1] if len(self.Messages) != 0 else None)]:
+            if value is not None: last[key] = value
+        payloads.append(last)
+        return payloads
+
+
+class PortalSender:
+    """Background thread that sends the pending updates to a Portal instance (one per host and port). Updates
+    generated while the previous ones are being sent are merged and sent together"""
+
+    sendersLock = Lock()
+    senders: Dict[Tuple[str, int], 'PortalSender'] = {}
+
+    def __init__(self, client: 'PortalApi'):
+        self.client = client
+        self.lock = Lock()
+        self.pending: Dict[int, PendingUpdate] = {}
+        self.wakeUp = Event()
+        self.thread = Thread(target=self.senderLoop, daemon=True, name=f'PortalSender{client.Host}:{client.Port}')
+        self.thread.start()
+
+    @classmethod
+    def Get(cls, client: 'PortalApi') -> 'PortalSender':
+        key = (client.Host, client.Port)
+        with cls.sendersLock:
+            sender = cls.senders.get(key, None)
+            if sender is None:
+                sender = cls.senders[key] = PortalSender(client)
+            return sender
+
+    @classmethod
+    def TotalPending(cls) -> int:
+        with cls.sendersLock:
+            senders = list(cls.senders.values())
+        return sum(len(sender.pending) for sender in senders)
+
+    def Enqueue(self, executionId: int, status: Optional[str], dashboardUrl: Optional[str],
+                percent: Optional[int], message: Optional[str]):
+        with self.lock:
+            update = self.pending.setdefault(executionId, PendingUpdate())
+            PortalApi.Dropped += update.Merge(status, dashboardUrl, percent, message)
+            PortalApi.Queued += 1
+        self.wakeUp.set()
+
+    def senderLoop(self):
+        while True:
+            self.wakeUp.wait()
+
+            with self.lock:
+                self.wakeUp.clear()
+                batch = self.pending
+                self.pending = {}
+
+            for executionId, update in sorted(batch.items()):
+                for payload in update.Payloads:
+                    try:
+                        self.client.SendUpdate(executionId, payload)
+                        PortalApi.Sent += 1
+                    except Exception as e:
+                        PortalApi.Failed += 1
+                        Log.W(f"Could not send update for execution {executionId} to the Portal: {e}")
+
+
 class PortalApi(RestClient):
+    # Counters (all Portal instances)
+    Queued = Sent = Failed = Dropped = 0
+
     def __init__(self, config: PortalConfig):
         self.Enabled = config.Enabled
+        self.Host = config.Host
+        self.Port = config.Port
         super().__init__(config.Host, config.Port, '/api')
 
     def UpdateExecutionData(self, executionId: int,
                             status: Optional[str] = None, dashboardUrl: Optional[str] = None,
                             percent: Optional[int] = None, message: Optional[str] = None):
+        """Enqueues the update without blocking. Pending updates for the same execution are merged"""
         if self.Enabled:
-            Thread(target=self.updateAsync,
-                   args=(executionId, status, dashboardUrl, percent, message)).start()
-
-    def updateAsync(self, executionId: int,
-                    status: Optional[str], dashboardUrl: Optional[str],
-                    percent: Optional[int], message: Optional[str]):
-
-        def _maybeAdd(key: str, value: Union[str, int]):
-            if value is not None: payload[key] = value
+            PortalSender.Get(self).Enqueue(executionId, status, dashboardUrl, percent, message)
 
+    def SendUpdate(self, executionId: int, payload: Dict[str, Union[str, int]]):
         url = f'{self.api_url}/execution/{executionId}'
-        payload = {}
-
-        _maybeAdd('Status', status)
-        _maybeAdd('Dashboard', dashboardUrl)
-        _maybeAdd('PerCent', percent)
-        _maybeAdd('Message', message)
-
         self.HttpPatch(url, {'Content-Type': 'application/json'}, json.dumps(payload))
+
+    @classmethod
+    def Counters(cls) -> Dict[str, int]:
+        return {'Queued': cls.Queued, 'Sent': cls.Sent, 'Failed': cls.Failed,
+                'Dropped': cls.Dropped, 'Pending': PortalSender.TotalPending()}
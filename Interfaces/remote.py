@@ -1,10 +1,14 @@
 from REST import RestClient
-from typing import List, Tuple, Dict, Optional
+from typing import List, Tuple, Dict, Optional, Iterator
 from Helper import Log
+from urllib.parse import quote
 from time import sleep
 
 
 class RemoteApi(RestClient):
+    PAGE_SIZE = 10000
+    RETRIES = 5  # Per request. Retrieving a page successfully resets the count
+
     def __init__(self, host, port):
         super().__init__(host, port, '/distributed')
 
@@ -45,7 +49,70 @@ class RemoteApi(RestClient):
             Log.E(f"GetValue error: {e}")
             return None
 
-    def GetResults(self, remoteId: int) -> List['InfluxPayload']:
+    def GetResults(self, remoteId: int) -> Iterator['InfluxPayload']:
+        """Retrieves the results of the remote execution page by page. Failed requests are retried from the last
+        page received, without restarting the whole download"""
+        from Helper import InfluxPayload
+        measurements = self.getMeasurements(remoteId)
+        if measurements is None:
+            yield from self.getLegacyResults(remoteId)
+            return
+
+        for measurement in measurements:
+            offset = 0
+            while offset is not None:
+                data = self.getResultsPage(remoteId, measurement, offset)
+                if data is None:
+                    Log.E(f"Could not retrieve results for '{measurement}' (after {offset} points), skipping")
+                    break
+                for series in data['series']:
+                    yield InfluxPayload.FromColumnarData(measurement, series)
+                offset = data['next']
+
+    def getMeasurements(self, remoteId: int) -> Optional[List[str]]:
+        """Returns None if the remote side does not support paged results"""
+        retries = self.RETRIES
+        while retries > 0:
+            try:
+                response = self.HttpGet(f'{self.api_url}/{remoteId}/measurements')
+                status, success = self.ResponseStatusCode(response)
+                if status == 404: return None
+                if not success: raise RuntimeError(f'Status {status}')
+
+                json = self.ResponseToJson(response)
+                if not json['success']:
+                    if "Database not available" in json["message"]:
+                        return []
+                    else:
+                        raise RuntimeError(json['message'])
+                return json['measurements']
+            except Exception as e:
+                Log.E(f"GetMeasurements error: {e}")
+                retries -= 1
+                sleep(5)
+        return []
+
+    def getResultsPage(self, remoteId: int, measurement: str, offset: int) -> Optional[Dict]:
+        url = f'{self.api_url}/{remoteId}/results/{quote(measurement)}?offset={offset}&limit={self.PAGE_SIZE}'
+        retries = self.RETRIES
+        while retries > 0:
+            try:
+                response = self.HttpGet(url, extra_headers={'Accept-Encoding': 'gzip'}, timeout=120)
+                status, success = self.ResponseStatusCode(response)
+                if not success: raise RuntimeError(f'Status {status}')
+
+                json = self.ResponseToJson(response)
+                if not json['success']:
+                    raise RuntimeError(json['message'])
+                return json
+            except Exception as e:
+                Log.E(f"GetResults error ('{measurement}', offset {offset}): {e}")
+                retries -= 1
+                sleep(5)
+        return None
+
+    def getLegacyResults(self, remoteId: int) -> List['InfluxPayload']:
+        """Retrieves all results in a single request, for remote ELCM instances without paged results"""
         from Helper import InfluxPayload
         url = f'{self.api_url}/{remoteId}/results'
         retries = 5
@@ -1,11 +1,14 @@
 import re
 import json
-from typing import Dict, Union, Optional
-from urllib3 import connection_from_url
-from requests import post
+from typing import Dict, Union, Optional, Tuple
+from urllib3 import connection_from_url, HTTPConnectionPool
+from requests import Session
+from requests.adapters import HTTPAdapter
+from threading import Lock
 from os.path import realpath, join
 from enum import Enum, unique
 from datetime import datetime
+from time import monotonic
 
 
 @unique
@@ -17,55 +20,118 @@ class Payload(Enum):
 class RestClient:
     HEADERS = {'Accept-Language': 'en-US;q=0.5,en;q=0.3'}
     RETRIES = 3
+    TRACE_LIMIT = 2048  # Maximum length of the bodies included in the (debug) traces
+    CHUNK_SIZE = 65536
+    JSON_ATTRIBUTE = 'parsedJson'  # Responses keep their parsed content here, so that it is only parsed once
     FILENAME_PATTERN = re.compile(r'.*filename="?(.*)"?')
 
+    # Connection pools are shared by all the clients of the same server, and reused for the whole process
+    poolsLock = Lock()
+    pools: Dict[Tuple[str, str, int, bool], HTTPConnectionPool] = {}
+    session: Optional[Session] = None  # Used for multipart (file) uploads
+
     def __init__(self, api_host, api_port, suffix, https=False, insecure=False):
         protocol = f'http{"s" if https else ""}://'
         port = api_port if api_port is not None else (443 if https else 80)
         self.api_url = f'{protocol}{api_host}:{port}{suffix}'
-
-        kw = {'maxsize': 1, 'headers': self.HEADERS}
-        if https and insecure:
-           kw['cert_reqs'] = 'CERT_NONE'
-
-        self.pool = connection_from_url(self.api_url, **kw)
         self.insecure = insecure
+        self.pool = self.getPool(protocol, api_host, port, https and insecure)
+
+    @classmethod
+    def getPool(cls, protocol: str, host: str, port: int, insecure: bool) -> HTTPConnectionPool:
+        key = (protocol, host, port, insecure)
+        size = cls.poolSize()  # Outside the lock, the configuration may create clients while validating
+        with cls.poolsLock:
+            pool = cls.pools.get(key, None)
+            if pool is None:
+                kw = {'maxsize': size, 'headers': cls.HEADERS}
+                if insecure:
+                    kw['cert_reqs'] = 'CERT_NONE'
+                pool = cls.pools[key] = connection_from_url(f'{protocol}{host}:{port}', **kw)
+            return pool
+
+    @classmethod
+    def getSession(cls) -> Session:
+        size = cls.poolSize()
+        with cls.poolsLock:
+            if cls.session is None:
+                adapter = HTTPAdapter(pool_connections=size, pool_maxsize=size)
+                cls.session = Session()
+                cls.session.mount('http://', adapter)
+                cls.session.mount('https://', adapter)
+            return cls.session
+
+    @staticmethod
+    def poolSize() -> int:
+        from Settings import Config  # Delayed to avoid cyclic imports
+        return Config().RestPoolSize
+
+    def request(self, method: str, url: str, files=None, **kwargs):
+        """Sends the request through the shared pool (or session, for file uploads), recording its latency"""
+        from Helper import Metrics
+        start = monotonic()
+        status = 'Error'
+        try:
+            if files is None:
+                response = self.pool.request(method, url, **kwargs)
+            else:
+                response = self.getSession().request(method, url, files=files, **kwargs)
+            status, _ = self.ResponseStatusCode(response)
+            return response
+        finally:
+            Metrics.Observe('elcm_rest_request_seconds', monotonic() - start,
+                            host=f'{self.pool.host}:{self.pool.port}', method=method, status=status)
 
     def GetTraceId(self):
         return str(int(datetime.now().timestamp()*1000000))[-8:]
 
     def Trace(self, traceId, url, method, headers=None, body=None, files=None):
-        from Helper import Log
+        from Helper import Log, Level
+        if not Log.IsEnabled(Level.DEBUG):
+            return
         Log.D(f"[{traceId}] >> [{method}] {url}")
         for name, param in [('Headers', headers), ('Body', body), ('Files', files)]:
             if param is not None:
-                Log.D(f'[{traceId}] >> {name}: {param}')
+                Log.D(f'[{traceId}] >> {name}: {self.truncate(str(param))}')
 
-    def DumpResponse(self, traceId, response):
-        from Helper import Log
-        code = body = None
-        try:
-            code, _ = self.ResponseStatusCode(response)
-        except RuntimeError: pass
-        try:
-            body = self.ResponseToJson(response)
-        except RuntimeError: pass
+    def DumpResponse(self, traceId, response, streamed=False):
+        from Helper import Log, Level
+        if not Log.IsEnabled(Level.DEBUG):
+            return response
+
+        code, _ = self.ResponseStatusCode(response)
+        if streamed:  # Do not consume the content
+            body = '<streamed>'
+        else:
+            raw = self.ResponseToRaw(response)
+            body = '<empty>' if len(raw) == 0 else \
+                self.truncate(raw[:self.TRACE_LIMIT + 1].decode('utf-8', errors='replace'), len(raw))
 
         Log.D(f'[{traceId}] << [Code {code}] {body}')
         return response
 
+    def truncate(self, text: str, total: Optional[int] = None) -> str:
+        if len(text) <= self.TRACE_LIMIT:
+            return text
+        return f'{text[:self.TRACE_LIMIT]}... ({total or len(text)} total)'
+
     def DownloadFile(self, url, output_folder) -> Optional[str]:
         try:
-            response = self.HttpGet(url)
-            filename = self.GetFilename(response.headers["Content-Disposition"])
-            output_file = realpath(join(output_folder, filename))
+            response = self.HttpGet(url, stream=True)
         except Exception:
             return None
 
-        with open(output_file, 'wb+') as out:
-            out.write(response.data)
+        try:
+            filename = self.GetFilename(response.headers["Content-Disposition"])
+            output_file = realpath(join(output_folder, filename))
 
-        response.release_conn()
+            with open(output_file, 'wb+') as out:
+                for chunk in response.stream(self.CHUNK_SIZE):
+                    out.write(chunk)
+        except Exception:
+            return None
+        finally:
+            response.release_conn()
         return output_file
 
     def GetFilename(self, content_disposition):
@@ -74,13 +140,15 @@ class RestClient:
             return result.group(1)
         return "unknown_filename"
 
-    def HttpGet(self, url, extra_headers=None, timeout=10):
+    def HttpGet(self, url, extra_headers=None, timeout=10, stream=False):
+        """With stream=True the content is not read in advance, use response.stream() and release_conn()"""
         traceId = self.GetTraceId()
         extra_headers = {} if extra_headers is None else extra_headers
 
         self.Trace(traceId, url, 'GET', headers=extra_headers)
-        return self.DumpResponse(traceId, self.pool.request('GET', url, headers=extra_headers,
-                                                            retries=self.RETRIES, timeout=timeout))
+        return self.DumpResponse(traceId, self.request('GET', url, headers=extra_headers,
+                                                       retries=self.RETRIES, timeout=timeout,
+                                                       preload_content=not stream), streamed=stream)
 
     def HttpPost(self, url, extra_headers=None, body: Optional[Union[str, Dict]] = None,
                  files=None, payload: Payload = None, timeout=10):
@@ -106,28 +174,29 @@ class RestClient:
 
         if files is None:
             return self.DumpResponse(traceId,
-                                     self.pool.request('POST', url, body=body or '',
-                                                       headers={**self.HEADERS, **extra_headers},
-                                                       retries=self.RETRIES, timeout=timeout))
+                                     self.request('POST', url, body=body or '',
+                                                  headers={**self.HEADERS, **extra_headers},
+                                                  retries=self.RETRIES, timeout=timeout))
         else:
             return self.DumpResponse(traceId,
-                                     post(f"{self.api_url}{url}", data=body, headers={**self.HEADERS, **extra_headers},
-                                          files=files, verify=not self.insecure))
+                                     self.request('POST', f"{self.api_url}{url}", data=body,
+                                                  headers={**self.HEADERS, **extra_headers},
+                                                  files=files, verify=not self.insecure))
 
     def HttpPatch(self, url, extra_headers=None, body='', timeout=10):
         traceId = self.GetTraceId()
         extra_headers = {} if extra_headers is None else extra_headers
         self.Trace(traceId, url, 'PATCH', headers=extra_headers, body=body)
-        return self.DumpResponse(traceId, self.pool.request('PATCH', url, body=body,
-                                                            headers={**self.HEADERS, **extra_headers},
-                                                            retries=self.RETRIES, timeout=timeout))
+        return self.DumpResponse(traceId, self.request('PATCH', url, body=body,
+                                                       headers={**self.HEADERS, **extra_headers},
+                                                       retries=self.RETRIES, timeout=timeout))
 
     def HttpDelete(self, url, extra_headers=None, timeout=10):
         traceId = self.GetTraceId()
         extra_headers = {} if extra_headers is None else extra_headers
         self.Trace(traceId, url, 'DELETE', headers=extra_headers)
-        return self.DumpResponse(traceId, self.pool.request('DELETE', url, headers={**self.HEADERS, **extra_headers},
-                                                            retries=self.RETRIES, timeout=timeout))
+        return self.DumpResponse(traceId, self.request('DELETE', url, headers={**self.HEADERS, **extra_headers},
+                                                       retries=self.RETRIES, timeout=timeout))
 
     @staticmethod
     def ResponseStatusCode(response) -> (int, bool):
@@ -147,12 +216,19 @@ class RestClient:
 
     @staticmethod
     def ResponseToJson(response) -> object:
+        """Parses the response content. The result is cached in the response, do not modify it"""
+        cached = getattr(response, RestClient.JSON_ATTRIBUTE, None)
+        if cached is not None:
+            return cached[0]
+
         raw = RestClient.ResponseToRaw(response)
 
         try:
-            return json.loads(raw.decode('utf-8'))
+            data = json.loads(raw)
         except Exception as e:
-            raise RuntimeError(f'JSON parse exception: {e}. data={raw}')
+            raise RuntimeError(f'JSON parse exception: {e}. data={raw[:RestClient.TRACE_LIMIT]}')
+        setattr(response, RestClient.JSON_ATTRIBUTE, (data,))
+        return data
 
     @staticmethod
     def JsonToUrlEncoded(jsonData: str) -> str:
@@ -1,5 +1,5 @@
 from flask import Flask
-from Helper import Log
+from Helper import Log, InfluxWriter, Compress
 from Status import Status
 from flask_bootstrap import Bootstrap
 from flask_moment import Moment
@@ -34,7 +34,11 @@ bootstrap = Bootstrap(app)
 moment = Moment(app)
 Log.Initialize(app)
 Status.Initialize()
+for partial in Compress.RemovePartial(os.path.abspath(config.ResultsFolder)):
+    Log.W(f"Removed incomplete results archive '{partial}'")
 HeartBeat.Initialize()
+if config.InfluxDb.Enabled:
+    InfluxWriter.Initialize()  # Replays any values spilled to disk before the last restart
 
 from Scheduler.execution import bp as ExecutionBp
 app.register_blueprint(ExecutionBp, url_prefix='/execution')
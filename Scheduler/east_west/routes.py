@@ -1,13 +1,27 @@
 from Scheduler.east_west import bp
-from Scheduler.execution import handleExecutionResults, executionOrTombstone
-from flask import jsonify, request, json
+from Scheduler.execution import handleExecutionResults, executionOrDigest
+from flask import jsonify, request, json, Response
 from Status import ExecutionQueue
 from Helper import InfluxDb
 from Settings import Config
+from typing import Dict
+import gzip
 
 
 notFound = {'success': False, 'message': 'Execution ID is not valid or experiment is not running'}
 hiddenVariables = ['Configuration', 'Descriptor']
+defaultPageSize = 10000
+maxPageSize = 100000
+
+
+def compressedJson(data: Dict) -> Response:
+    """JSON response, gzip-compressed if the client accepts it"""
+    body = json.dumps(data).encode('utf-8')
+    response = Response(body, mimetype='application/json')
+    if 'gzip' in request.accept_encodings:
+        response.set_data(gzip.compress(body, compresslevel=5))
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
 
 
 @bp.route('/<int:executionId>/peerDetails', methods=['POST'])
@@ -66,7 +80,7 @@ def values(executionId: int, name: str = None):
 
 @bp.route('/<int:executionId>/results')
 def results(executionId: int):
-    execution = executionOrTombstone(executionId)
+    execution = executionOrDigest(executionId)
     if execution is not None:
         if Config().InfluxDb.Enabled:
             influx = InfluxDb()
@@ -100,6 +114,38 @@ def results(executionId: int):
         return jsonify(notFound)
 
 
+@bp.route('/<int:executionId>/measurements')
+def measurements(executionId: int):
+    execution = executionOrDigest(executionId)
+    if execution is not None:
+        if Config().InfluxDb.Enabled:
+            return jsonify({'success': True, 'measurements': InfluxDb.GetExecutionMeasurements(executionId),
+                            'message': f"Measurements for execution {executionId} retrieved successfully"})
+        else:
+            return {'success': False, 'message': 'Database not available'}
+    else:
+        return jsonify(notFound)
+
+
+@bp.route('/<int:executionId>/results/<measurement>')
+def resultsPage(executionId: int, measurement: str):
+    """Paged alternative to 'results'. Values are returned in columnar form, a new request with 'offset' set to the
+    value of 'next' retrieves the following page ('next' is null after the last one)"""
+    execution = executionOrDigest(executionId)
+    if execution is not None:
+        if Config().InfluxDb.Enabled:
+            offset = max(0, request.args.get('offset', 0, type=int))
+            limit = min(max(1, request.args.get('limit', defaultPageSize, type=int)), maxPageSize)
+            series, count = InfluxDb.GetMeasurementPage(executionId, measurement, offset, limit)
+            return compressedJson({'success': True, 'measurement': measurement, 'series': series,
+                                   'offset': offset, 'next': offset + count if count == limit else None,
+                                   'message': f"Results for execution {executionId} retrieved successfully"})
+        else:
+            return {'success': False, 'message': 'Database not available'}
+    else:
+        return jsonify(notFound)
+
+
 # Shared implementation with execution.results
 @bp.route('<int:executionId>/files')
 def files(executionId: int):
@@ -1,11 +1,12 @@
-from flask import redirect, url_for, flash, render_template, jsonify, send_from_directory
+from flask import redirect, url_for, flash, render_template, jsonify, send_from_directory, request
 from Status import Status, ExecutionQueue
-from Experiment import ExperimentRun, Tombstone
+from Experiment import ExperimentRun, Tombstone, ExecutionDigest
 from Scheduler.execution import bp
 from typing import Union, Optional
 from Settings import Config
 from Data import ExperimentDescriptor
 from Facility import Facility
+from Helper import Log
 from os.path import join, isfile, abspath
 
 
@@ -42,7 +43,7 @@ def view(executionId: int):
 @bp.route('<int:executionId>/json')
 @bp.route('<int:executionId>/status')
 def json(executionId: int):
-    execution = executionOrTombstone(executionId)
+    execution = executionOrDigest(executionId)
     coarse = status = 'ERR'
     verdict = 'NotSet'
     percent = 0
@@ -50,7 +51,7 @@ def json(executionId: int):
     if execution is not None:
         coarse = execution.CoarseStatus.name
         verdict = execution.Verdict.name
-        if isinstance(execution, Tombstone):
+        if isinstance(execution, ExecutionDigest):
             status = "Not Running"
         else:
             status = execution.Status
@@ -73,26 +74,54 @@ def executionOrTombstone(executionId: int) -> Optional[Union[ExperimentRun, Tomb
     return execution
 
 
+def executionOrDigest(executionId: int) -> Optional[Union[ExperimentRun, ExecutionDigest]]:
+    """Cheaper alternative to executionOrTombstone, for routes that do not need the execution stages"""
+    execution = ExecutionQueue.Find(executionId)
+    if execution is None:
+        try:
+            execution = ExecutionDigest.Get(executionId)
+        except Exception as e:
+            Log.W(f"Unable to load the information of execution {executionId}: {e}")
+            execution = None
+    return execution
+
+
 @bp.route('<int:executionId>/logs')
 def logs(executionId: int):
     execution = executionOrTombstone(executionId)
 
     if execution is not None:
+        try:
+            cursors = [int(c) for c in request.args.get('cursor', '0,0,0').split(',')]
+            if len(cursors) != 3: raise ValueError()
+        except ValueError:
+            return "Invalid cursor", 400
+
+        levels = request.args.get('level', None)
+        levels = None if levels is None else {level.strip().capitalize() for level in levels.split(',')}
+        label = request.args.get('label', None)
+
         status = "Success"
-        preRun = execution.PreRunner.RetrieveLogInfo().Serialize()
-        executor = execution.Executor.RetrieveLogInfo().Serialize()
-        postRun = execution.PostRunner.RetrieveLogInfo().Serialize()
+        logs = []
+        for child, cursor in zip([execution.PreRunner, execution.Executor, execution.PostRunner], cursors):
+            if levels is None and label is None:
+                logInfo, cursor = child.RetrieveLogInfoSince(cursor)
+            else:
+                logInfo, cursor = child.RetrieveFilteredLogInfo(cursor, levels, label)
+            logs.append((logInfo.Serialize(), cursor))
+        (preRun, preRunCursor), (executor, executorCursor), (postRun, postRunCursor) = logs
+        cursor = f"{preRunCursor},{executorCursor},{postRunCursor}"
     else:
         status = "Not Found"
-        preRun = executor = postRun = None
+        preRun = executor = postRun = cursor = None
     return jsonify({
-        "Status": status, "PreRun": preRun, "Executor": executor, "PostRun": postRun
+        "Status": status, "PreRun": preRun, "Executor": executor, "PostRun": postRun, "Cursor": cursor
     })
 
 
 @bp.route('<int:executionId>/peerId')
 def peerId(executionId: int):
-    execution = executionOrTombstone(executionId)
+    execution = executionOrDigest(executionId)
 
     return jsonify({
         'RemoteId': execution.RemoteId if execution is not None else None
@@ -106,12 +135,14 @@ def results(executionId: int):
 
 
 def handleExecutionResults(executionId: int):
-    execution = executionOrTombstone(executionId)
+    execution = executionOrDigest(executionId)
     if execution is not None:
         folder = abspath(Config().ResultsFolder)
         filename = f"{executionId}.zip"
         if isfile(join(folder, filename)):
             return send_from_directory(folder, filename, as_attachment=True)
+        elif isfile(join(folder, f"{filename}.part")):
+            return f"Results for execution {executionId} are being compressed", 503
         else:
             return f"No results for execution {executionId}", 404
     else:
@@ -120,7 +151,7 @@ def handleExecutionResults(executionId: int):
 
 @bp.route('<int:executionId>/descriptor')
 def descriptor(executionId: int):
-    execution = executionOrTombstone(executionId)
+    execution = executionOrDigest(executionId)
 
     if execution is not None:
         return jsonify(execution.JsonDescriptor)
@@ -130,7 +161,7 @@ def descriptor(executionId: int):
 
 @bp.route('<int:executionId>/kpis')
 def kpis(executionId: int):
-    execution = executionOrTombstone(executionId)
+    execution = executionOrDigest(executionId)
 
     if execution is not None:
         kpis = set()
@@ -1,23 +1,28 @@
 from Helper import Child
 from typing import Dict
 from Helper import Level
-from time import sleep
+from time import monotonic
 from Status import ExecutionQueue
 
 
 class Beat(Child):
+    SWEEP_INTERVAL = 10  # Seconds between full updates, as a safety net for missed notifications
+
     def __init__(self, params: Dict):
         super().__init__(f"HeartBeat")
         self.params = params
 
     def Run(self):
+        lastSweep = monotonic()
+        ExecutionQueue.UpdateAll()
         while not self.stopRequested:
-            ExecutionQueue.UpdateAll()
-            Beat.wait()
-
-    @staticmethod
-    def wait():
-        sleep(10)
+            remaining = max(0.0, self.SWEEP_INTERVAL - (monotonic() - lastSweep))
+            notified = ExecutionQueue.WaitForNotifications(remaining)
+            if monotonic() - lastSweep >= self.SWEEP_INTERVAL:
+                lastSweep = monotonic()
+                ExecutionQueue.UpdateAll()
+            else:
+                ExecutionQueue.UpdatePending(notified)
 
 
 class HeartBeat:
@@ -28,4 +33,3 @@ class HeartBeat:
         if cls.beat is None:
             cls.beat = Beat(params={})
             cls.beat.Start()
-
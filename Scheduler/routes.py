@@ -1,12 +1,13 @@
 from Scheduler import app
 from Status import Status, ExecutionQueue
-from Experiment import Tombstone
-from flask import render_template, make_response, request, flash, redirect, url_for
+from Experiment import ExecutionDigest, ExperimentStatus
+from flask import render_template, make_response, request, flash, redirect, url_for, Response
 from functools import wraps, update_wrapper
 from datetime import datetime
-from Helper import Log, Serialize, LogInfo
+from Helper import Log, Persistence, LogInfo, Metrics, InfluxWriter
 from Settings import Config, EvolvedConfig
-from Facility import Facility
+from Facility import Facility, Admission
+from Interfaces import PortalApi
 from typing import List, Dict
 from flask_paginate import Pagination, get_page_parameter
 
@@ -45,19 +46,16 @@ def log():
 
 @app.route("/history")
 def history():
-    ids = Serialize.List(False, False, 'Execution')
-    ids.sort(key=int, reverse=True)
     page = request.args.get(get_page_parameter(), type=int, default=1)
-    pagination = Pagination(page=page, total=len(ids), search=False,
+    pagination = Pagination(page=page, total=Persistence.Count('Execution'), search=False,
                             record_name='executions', per_page=10, bs_version=4,
                             display_msg='Displaying <b>{start} - {end}</b> {record_name} (out of <b>{total}</b>)')
-    start = pagination.skip
-    end = start + pagination.per_page
-    ids = ids[start:end]
-    executions: List[Tombstone] = []
+    ids = Persistence.Ids('Execution', pagination.skip, pagination.per_page)
+    executions: List[ExecutionDigest] = []
     for id in ids:
-        digest = Tombstone(id)
-        executions.append(digest)
+        digest = ExecutionDigest.Get(id)
+        if digest is not None:
+            executions.append(digest)
 
     return render_template('history.html', executions=executions, pagination=pagination)
 
@@ -92,3 +90,18 @@ def reloadFacility():
         flash(f"Exception while reloading facility: {e}", "error")
     finally:
         return redirect(url_for('index'))
+
+
+@app.route("/metrics")
+def metrics():
+    """Prometheus text format. Values that describe the current state are sampled here"""
+    for status in ExperimentStatus:
+        Metrics.Set('elcm_executions', len(ExecutionQueue.Retrieve(status)), status=status.name)
+    Metrics.Set('elcm_active_experiments', Facility.activeExperiments)
+    Metrics.Set('elcm_busy_resources', len(Facility.BusyResources()))
+    Metrics.Set('elcm_waiting_executions', len(Admission.waiters))
+    for name, value in InfluxWriter.Counters().items():
+        Metrics.Set('elcm_influxdb_writer_lines', value, state=name)
+    for name, value in PortalApi.Counters().items():
+        Metrics.Set('elcm_portal_updates', value, state=name)
+    return Response(Metrics.Render(), mimetype='text/plain; version=0.0.4')
@@ -3,6 +3,7 @@ from os import getenv
 from typing import Dict, List, Tuple, Optional
 import logging
 import platform
+import re
 from Helper.log_level import Level
 from .config_base import validable, restApi, enabledLoginRestApi, ConfigBase
 
@@ -141,6 +142,7 @@ class InfluxDb(enabledLoginRestApi):
     def __init__(self, data: Dict):
         defaults = {
             'Database': (None, Level.ERROR),
+            'Gzip': (False, Level.INFO),
         }
         super().__init__(data, 'InfluxDb', defaults)
 
@@ -148,13 +150,18 @@ class InfluxDb(enabledLoginRestApi):
     def Database(self):
         return self._keyOrDefault('Database')
 
+    @property
+    def Gzip(self):
+        return self._keyOrDefault('Gzip')
+
 
 class Logging(validable):
     def __init__(self, data: Dict):
         defaults = {
             'Folder': ('Logs', Level.WARNING),
             'AppLevel': ('info', Level.WARNING),
-            'LogLevel': ('debug', Level.WARNING)
+            'LogLevel': ('debug', Level.WARNING),
+            'Format': ('Text', Level.INFO)
         }
         super().__init__(data, 'Logging', defaults)
 
@@ -179,6 +186,54 @@ class Logging(validable):
     def LogLevel(self):
         return self.toLogLevel(self._keyOrDefault("LogLevel"))
 
+    @property
+    def Format(self) -> str:
+        """'Text' or 'Json' (JSON lines), for the execution log files"""
+        return 'Json' if str(self._keyOrDefault("Format")).lower() == 'json' else 'Text'
+
+
+class TaskLog(validable):
+    MODES = ['Spill', 'Ring', 'Filter']
+
+    def __init__(self, data: Dict):
+        defaults = {
+            'Mode': ('Spill', Level.INFO),
+            'Lines': (10000, Level.INFO),
+            'Pattern': (None, Level.INFO),
+        }
+        super().__init__(data, 'TaskLog', defaults)
+
+    @property
+    def Mode(self) -> str:
+        return self._keyOrDefault('Mode')
+
+    @property
+    def Lines(self) -> int:
+        """Messages kept in memory (Spill mode) or in total (Ring and Filter modes)"""
+        return self._keyOrDefault('Lines')
+
+    @property
+    def Pattern(self) -> Optional[str]:
+        return self._keyOrDefault('Pattern')
+
+    @property
+    def Validation(self) -> List[Tuple['Level', str]]:
+        res = super().Validation
+        if self.Mode not in self.MODES:
+            res.append((Level.ERROR,
+                        f"Unrecognized TaskLog Mode '{self.Mode}', must be one of {', '.join(self.MODES)}"))
+        if not isinstance(self.Lines, int) or self.Lines < 1:
+            res.append((Level.ERROR, "TaskLog Lines must be a positive integer"))
+        if self.Mode == 'Filter':
+            if self.Pattern is None:
+                res.append((Level.ERROR, "TaskLog Pattern is mandatory when using the 'Filter' mode"))
+            else:
+                try:
+                    re.compile(self.Pattern)
+                except re.error as e:
+                    res.append((Level.ERROR, f"Invalid TaskLog Pattern: {e}"))
+        return res
+
 
 class Metadata(validable):
     def __init__(self, data: Dict):
@@ -229,6 +284,14 @@ class Config(ConfigBase):
     def VerdictOnError(self):
         return Config.data.get('VerdictOnError', 'Error')
 
+    @property
+    def Persistence(self):
+        return Config.data.get('Persistence', 'Yaml')
+
+    @property
+    def RestPoolSize(self) -> int:
+        return Config.data.get('RestPoolSize', 10)
+
     @property
     def Tap(self):
         return TapConfig(Config.data.get('Tap', {}))
@@ -245,6 +308,10 @@ class Config(ConfigBase):
     def InfluxDb(self):
         return InfluxDb(Config.data.get('InfluxDb', {}))
 
+    @property
+    def TaskLog(self):
+        return TaskLog(Config.data.get('TaskLog', {}))
+
     @property
     def Metadata(self):
         return Metadata(Config.data.get('Metadata', {}))
@@ -264,16 +331,25 @@ class Config(ConfigBase):
         keys.discard('TempFolder')
         keys.discard('ResultsFolder')
         keys.discard('VerdictOnError')
+        keys.discard('Persistence')
+        keys.discard('RestPoolSize')
 
         if getenv('SECRET_KEY') is None:
             Config.Validation.append((Level.CRITICAL,
                                       "SECRET_KEY not defined. Use environment variables or set a value in .flaskenv"))
 
-        for key, default in [('TempFolder', 'Temp'), ('ResultsFolder', 'Results'), ('VerdictOnError', 'Error')]:
+        for key, default in [('TempFolder', 'Temp'), ('ResultsFolder', 'Results'), ('VerdictOnError', 'Error'),
+                             ('Persistence', 'Yaml'), ('RestPoolSize', 10)]:
             _validateSingle(key, default)
 
+        if self.Persistence not in ['Yaml', 'Sqlite']:
+            Config.Validation.append((Level.CRITICAL, f"Unrecognized Persistence backend '{self.Persistence}'"))
+
+        if not isinstance(self.RestPoolSize, int) or self.RestPoolSize < 1:
+            Config.Validation.append((Level.ERROR, f"RestPoolSize must be a positive integer"))
+
         for entry in [self.Logging, self.Portal, self.SliceManager, self.Tap,
-                      self.Grafana, self.InfluxDb, self.Metadata, self.EastWest, ]:
+                      self.Grafana, self.InfluxDb, self.Metadata, self.EastWest, self.TaskLog, ]:
             Config.Validation.extend(entry.Validation)
             keys.discard(entry.section)
 
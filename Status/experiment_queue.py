@@ -1,32 +1,51 @@
-from collections import deque
+from threading import Event, Lock, RLock
 from Experiment import ExperimentRun, ExperimentStatus
-from typing import Deque, Optional, List, Dict
-from Helper import Log
+from typing import Optional, List, Dict, Set
+from time import monotonic
+from Helper import Log, Metrics
+from Utils import synchronized
 from .status import Status
 
 
 class ExecutionQueue:
-    queue: Deque[ExperimentRun] = deque()
+    lock = RLock()
+    executions: Dict[int, ExperimentRun] = {}  # Insertion (creation) order, oldest first
+    byStatus: Dict[ExperimentStatus, Dict[int, ExperimentRun]] = {status: {} for status in ExperimentStatus}
+
+    pendingLock = Lock()
+    pending: Set[int] = set()  # Executions notified since the last update
+    wakeUp = Event()
 
     @classmethod
+    @synchronized(lock)
     def Find(cls, executionId) -> Optional[ExperimentRun]:
-        needles = [e for e in cls.queue if e.Id == executionId]
-        return needles[0] if needles else None
+        return cls.executions.get(executionId, None)
 
     @classmethod
     def Create(cls, params: Dict) -> ExperimentRun:
+        """Reserves an id and queues the execution. The platform configuration is composed in the background"""
         executionId = Status.NextId()
         execution = ExperimentRun(executionId, params)
-        cls.queue.appendleft(execution)
+        cls.add(execution)
+        execution.SaveDescriptor()
         Log.I(f'Created Execution {execution.Id}')
+        execution.StartComposition()
         return execution
 
+    @classmethod
+    @synchronized(lock)
+    def add(cls, execution: ExperimentRun):
+        cls.executions[execution.Id] = execution
+        cls.byStatus[execution.CoarseStatus][execution.Id] = execution
+
     @classmethod
     def Delete(cls, executionId):
         execution = cls.Find(executionId)
         if execution is not None:
             execution.Save()
-            cls.queue.remove(execution)
+            with cls.lock:
+                cls.executions.pop(execution.Id, None)
+                cls.byStatus[execution.CoarseStatus].pop(execution.Id, None)
 
     @classmethod
     def Cancel(cls, executionId: int):
@@ -34,31 +53,70 @@ class ExecutionQueue:
         if execution is not None:
             Log.I(f'Cancelling execution {execution.Id}')
             execution.Cancel()
+            cls.Notify(execution.Id)
         else:
             Log.W(f'Cannot cancel execution {executionId}: Not found')
 
     @classmethod
+    @synchronized(lock)
     def Retrieve(cls, status: Optional[ExperimentStatus] = None) -> List[ExperimentRun]:
-        if status is None:
-            return list(cls.queue)
-        else:
-            return [e for e in cls.queue if e.CoarseStatus == status]
+        """Returns the selected executions, most recent first"""
+        collection = cls.executions if status is None else cls.byStatus[status]
+        return list(reversed(collection.values()))
+
+    @classmethod
+    @synchronized(lock)
+    def StatusChanged(cls, execution: ExperimentRun, previous: ExperimentStatus):
+        """Keeps the per-status index updated. Called by the execution whenever its CoarseStatus changes"""
+        if execution.Id in cls.executions:
+            cls.byStatus[previous].pop(execution.Id, None)
+            cls.byStatus[execution.CoarseStatus][execution.Id] = execution
+
+    @classmethod
+    def Notify(cls, executionId: int):
+        """Marks an execution as ready to advance and wakes up the scheduler"""
+        with cls.pendingLock:
+            cls.pending.add(executionId)
+        cls.wakeUp.set()
+
+    @classmethod
+    def WaitForNotifications(cls, timeout: float) -> List[int]:
+        """Blocks until an execution is notified (or the timeout expires). Returns the notified ids, oldest first"""
+        cls.wakeUp.wait(timeout)
+        with cls.pendingLock:
+            cls.wakeUp.clear()
+            res = sorted(cls.pending)
+            cls.pending.clear()
+        return res
 
     @classmethod
     def UpdateAll(cls):
+        start = monotonic()
         executions = cls.Retrieve()
         if len(executions) != 0:
             Log.D(f"UpdateAll: {(', '.join(str(e) for e in executions))}")
         for execution in reversed(executions):  # Reversed to give priority to older executions (for resources)
-            Log.D(f"Update Execution: {execution.Id}")
-            try:
-                if execution.Active:
-                    pre = execution.CoarseStatus
-                    Log.I(f'Advancing Execution {execution.Id}')
-                    execution.Advance()
-                    Log.D(f'{execution.Id}: {pre.name} -> {execution.CoarseStatus.name}')
-                else:
-                    Log.I(f'Removing Execution {execution.Id} from queue (status: {execution.CoarseStatus.name})')
-                    cls.Delete(execution.Id)
-            except Exception as e:
-                Log.C(f"Exception while updating execution {execution.Id}: {e}")
+            cls.update(execution)
+        Metrics.Observe('elcm_queue_update_seconds', monotonic() - start)
+
+    @classmethod
+    def UpdatePending(cls, executionIds: List[int]):
+        for executionId in executionIds:
+            execution = cls.Find(executionId)
+            if execution is not None:
+                cls.update(execution)
+
+    @classmethod
+    def update(cls, execution: ExperimentRun):
+        Log.D(f"Update Execution: {execution.Id}")
+        try:
+            if execution.Active:
+                pre = execution.CoarseStatus
+                Log.I(f'Advancing Execution {execution.Id}')
+                execution.Advance()
+                Log.D(f'{execution.Id}: {pre.name} -> {execution.CoarseStatus.name}')
+            else:
+                Log.I(f'Removing Execution {execution.Id} from queue (status: {execution.CoarseStatus.name})')
+                cls.Delete(execution.Id)
+        except Exception as e:
+            Log.C(f"Exception while updating execution {execution.Id}: {e}")
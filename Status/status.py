@@ -1,14 +1,16 @@
 from threading import Lock
 from Helper import Serialize, IO
 from Utils import synchronized
-from os.path import dirname
+from os.path import dirname, exists
 
 
 class Status:
     FILENAME = 'persistence.yml'
+    BLOCK_SIZE = 100  # Ids reserved on each write of the persistence file
 
     lock = Lock()
     nextId = 0
+    reservedUntil = 0  # Ids below this value have been persisted as used, and are never reused
 
     _persistence_yml = {'NextId': 0}
 
@@ -17,23 +19,27 @@ class Status:
     def Initialize(cls):
         path = Serialize.Path('persistence')
 
-        if not IO.EnsureFolder(dirname(path)):
+        if not IO.EnsureFolder(dirname(path)) or not exists(path):
             Serialize.Save(cls._persistence_yml, path)
 
         data = Serialize.Load(path)
-        cls.nextId = data['NextId']
+        cls.nextId = cls.reservedUntil = data['NextId']
 
     @classmethod
-    @synchronized(lock)
-    def Save(cls):
-        data = {'NextId': cls.nextId}
+    def save(cls, nextId: int):
+        data = {'NextId': nextId}
         Serialize.Save(data, Serialize.Path('persistence'))
 
     @classmethod
+    @synchronized(lock)
     def NextId(cls):
+        """Returns a new execution id. Ids are reserved in blocks, so after a restart the ids that were reserved but
+        not used are skipped"""
+        if cls.nextId >= cls.reservedUntil:
+            cls.save(cls.nextId + cls.BLOCK_SIZE)
+            cls.reservedUntil = cls.nextId + cls.BLOCK_SIZE
         res = cls.nextId
         cls.nextId += 1
-        cls.Save()
         return res
 
     @classmethod
@@ -1 +1,2 @@
+from .log_capture import LogCapture
 from .task import Task
@@ -0,0 +1,96 @@
+from typing import Dict, Iterator, List, Optional, IO
+from collections import deque
+from tempfile import mkstemp
+from os import remove
+from threading import Lock
+import json
+import re
+
+
+class LogCapture:
+    """Messages logged by a task, available for the next task as PreviousTaskLog. Depending on the mode, the memory
+    used is bounded:
+      - Spill: All messages. After the first 'Lines' messages the rest are written to a temporary file.
+      - Ring: Only the last 'Lines' messages.
+      - Filter: Only the messages that match 'Pattern' (the last 'Lines' of them)."""
+
+    SPILL, RING, FILTER = MODES = ('Spill', 'Ring', 'Filter')
+
+    def __init__(self, mode: str, lines: int, pattern: Optional[str] = None, folder: Optional[str] = None):
+        if mode not in self.MODES:
+            raise ValueError(f"Unrecognized log capture mode '{mode}'")
+        if mode == self.FILTER and pattern is None:
+            raise ValueError("'Pattern' is mandatory for the 'Filter' mode")
+        self.Mode = mode
+        self.Lines = lines
+        self.folder = folder
+        self.pattern = re.compile(pattern) if mode == self.FILTER else None
+        self.memory: deque = deque(maxlen=None if mode == self.SPILL else lines)
+        self.spill: Optional[IO] = None
+        self.spillPath: Optional[str] = None
+        self.spilled = 0
+        self.lock = Lock()
+        self.Warning: Optional[str] = None  # Set if the task configuration could not be used
+
+    @classmethod
+    def ForTask(cls, params: Dict, folder: Optional[str]) -> 'LogCapture':
+        """Uses the 'TaskLog' configuration, overridden by the 'LogCapture' task parameter (if any)"""
+        from Settings import Config  # Delayed to avoid cyclic imports
+        config = Config().TaskLog
+        overrides = params.get('LogCapture', None) or {}
+        try:
+            lines = overrides.get('Lines', config.Lines)
+            if not isinstance(lines, int) or lines < 1:
+                raise ValueError("'Lines' must be a positive integer")
+            return LogCapture(overrides.get('Mode', config.Mode), lines,
+                              overrides.get('Pattern', config.Pattern), folder)
+        except (ValueError, AttributeError, re.error) as e:
+            capture = LogCapture(config.Mode, config.Lines, config.Pattern, folder)
+            capture.Warning = f"Invalid LogCapture value ({e}), using the TaskLog configuration"
+            return capture
+
+    def Append(self, message: str):
+        if self.pattern is not None and self.pattern.search(message) is None:
+            return
+
+        with self.lock:
+            if self.Mode != self.SPILL or len(self.memory) < self.Lines:
+                self.memory.append(message)
+            else:
+                if self.spill is None:
+                    handle, self.spillPath = mkstemp(suffix='.log', prefix='capture_', dir=self.folder)
+                    self.spill = open(handle, 'w', encoding='utf-8')
+                self.spill.write(json.dumps(message) + '\n')  # Messages may contain line breaks
+                self.spilled += 1
+
+    def __iter__(self) -> Iterator[str]:
+        """Streams the captured messages, in order. Reading the spilled messages does not load them all in memory.
+        Each iterator reads the spilled messages through its own handle, so several can be used at the same time"""
+        with self.lock:
+            messages: List[str] = list(self.memory)
+            if self.spill is not None:
+                self.spill.flush()
+            spilled, path = self.spilled, self.spillPath
+        yield from messages
+
+        if spilled != 0:
+            with open(path, 'r', encoding='utf-8') as spill:
+                for _, line in zip(range(spilled), spill):
+                    yield json.loads(line)
+
+    def __len__(self) -> int:
+        return len(self.memory) + self.spilled
+
+    def Close(self):
+        """Releases the temporary file (if any). No messages are available afterwards"""
+        with self.lock:
+            if self.spill is not None:
+                self.spill.close()
+                self.spill = None
+                try:
+                    remove(self.spillPath)
+                except OSError:
+                    pass  # Still open by an iterator (Windows), removed along with the temporal folder
+                self.spillPath = None
+            self.memory.clear()
+            self.spilled = 0
@@ -1,9 +1,19 @@
 from typing import Callable, Dict, Optional, Union, Tuple, Any, List
-from Helper import Log, Level
+from Helper import Log, Level, Metrics
 from Settings import Config
+from .log_capture import LogCapture
+from time import monotonic, thread_time
+from datetime import datetime, timezone
+from contextlib import contextmanager
+from cProfile import Profile
+from pstats import Stats, SortKey
+from os.path import join
+import re
 
 
 class Task:
+    PROFILE_LINES = 60  # Functions included in the text report of profiled tasks
+
     def __init__(self, name: str, parent, params: Optional[Dict] = None,
                  logMethod: Optional[Callable] = None,
                  conditionMethod: Optional[Callable] = None):
@@ -17,10 +27,12 @@ class Task:
         self.logMethod = Log.Log if logMethod is None else logMethod
         self.condition = conditionMethod
         self.Vault = {}
-        self.LogMessages = []
+        self.LogMessages = LogCapture.ForTask(self.params, parent.TempFolder if parent is not None else None)
         self.Verdict = Verdict.NotSet
         self.Label = None
         self.Children: List[TaskDefinition] = []
+        self.Started: Optional[datetime] = None
+        self.Timings: Dict[str, Dict[str, float]] = {}  # Wall-clock and CPU time (seconds) per lifecycle step
 
     def Start(self) -> Dict:
         from Executor import Verdict
@@ -32,19 +44,90 @@ class Task:
         if self.condition is None or self.condition():
             self.Log(Level.INFO, f"[Starting Task '{identifier}']")
             self.Log(Level.DEBUG, f'Params: {self.params}')
-            if self.SanitizeParams():
-                self.Run()
-                self.Log(Level.INFO, f"[Task '{identifier}' finished (verdict: '{self.Verdict.name}')]")
-            else:
-                message = f"[Task '{identifier}' aborted due to incorrect parameters ({self.params})]"
-                self.Log(Level.ERROR, message)
-                self.Verdict = Verdict.Error
-                raise RuntimeError(message)
+            if self.LogMessages.Warning is not None:
+                self.Log(Level.WARNING, self.LogMessages.Warning)
+            self.Started = datetime.now(timezone.utc)
+            verdict = Verdict.Error
+            try:
+                with self.measure('SanitizeParams'):
+                    valid = self.SanitizeParams()
+                if valid:
+                    with self.measure('Run'):
+                        if self.params.get('Profile', False):
+                            self.runProfiled()
+                        else:
+                            self.Run()
+                    verdict = self.Verdict
+                    self.Log(Level.INFO, f"[Task '{identifier}' finished (verdict: '{self.Verdict.name}')]")
+                else:
+                    message = f"[Task '{identifier}' aborted due to incorrect parameters ({self.params})]"
+                    self.Log(Level.ERROR, message)
+                    self.Verdict = Verdict.Error
+                    raise RuntimeError(message)
+            finally:
+                self.recordTimings(verdict)
             self.Log(Level.DEBUG, f'Params: {self.params}')
+            if self.LogMessages.Warning is not None:
+                self.Log(Level.WARNING, self.LogMessages.Warning)
         else:
             self.Log(Level.INFO, f"[Task '{identifier}' not started (condition false)]")
         return self.params
 
+    def PropagateValues(self):
+        """Adds the values published by the task (Vault) to the parameters of the executor"""
+        with self.measure('Propagation'):
+            self.parent.PublishValues(self.Vault)
+
+    @contextmanager
+    def measure(self, step: str):
+        """Records the wall-clock and CPU (current thread) time spent on a step of the task lifecycle"""
+        wall, cpu = monotonic(), thread_time()
+        try:
+            yield
+        finally:
+            self.Timings[step] = {'Wall': monotonic() - wall, 'Cpu': thread_time() - cpu}
+
+    def recordTimings(self, verdict: 'Verdict'):
+        task = type(self).__name__
+        if 'Run' in self.Timings:
+            Metrics.Observe('elcm_task_duration_seconds', self.Timings['Run']['Wall'], task=task)
+        Metrics.Increment('elcm_task_verdicts_total', task=task, verdict=verdict.name)
+        if self.parent is not None:  # The record keeps a reference to Timings, so Propagation is added later
+            self.parent.AddTaskTimings({'Task': task, 'Label': self.Label, 'Started': self.Started,
+                                        'Verdict': verdict.name, 'Timings': self.Timings})
+
+    def runProfiled(self):
+        """Runs the task under cProfile. Only the thread of the task is profiled (not Flow.Parallel branches)"""
+        profile = Profile()
+        try:
+            profile.enable()
+        except ValueError as e:  # Another profiler is already active on this thread (e.g. profiled parent task)
+            self.Log(Level.WARNING, f"Unable to profile task: {e}")
+            self.Run()
+            return
+
+        try:
+            self.Run()
+        finally:
+            profile.disable()
+            self.saveProfile(profile)
+
+    def saveProfile(self, profile: Profile):
+        folder = self.parent.TempFolder if self.parent is not None else None
+        if folder is None:
+            self.Log(Level.WARNING, "No temporal folder available, profile discarded")
+            return
+
+        baseName = join(folder, re.sub(r'[^\w.-]+', '_', f'{self.Label}_{self.name}_profile'))
+        try:
+            profile.dump_stats(f'{baseName}.prof')
+            with open(f'{baseName}.txt', 'w', encoding='utf-8') as output:
+                Stats(profile, stream=output).sort_stats(SortKey.CUMULATIVE).print_stats(self.PROFILE_LINES)
+            self.parent.GeneratedFiles.extend([f'{baseName}.prof', f'{baseName}.txt'])
+            self.Log(Level.INFO, f"Profile saved to '{baseName}.txt' (raw data in '{baseName}.prof')")
+        except Exception as e:
+            self.Log(Level.WARNING, f"Unable to save profile: {e}")
+
     def Publish(self, key: str, value: object):
         self.Log(Level.DEBUG, f'Published value "{value}" under key "{key}"')
         self.Vault[key] = value
@@ -52,9 +135,18 @@ class Task:
     def Run(self) -> None:
         raise NotImplementedError
 
+    @property
+    def StopRequested(self) -> bool:
+        return self.parent.stopRequested
+
+    def Wait(self, seconds: float) -> bool:
+        """Sleeps for the specified number of seconds. Returns True (as soon as it happens) if the execution is
+        cancelled, in which case the task should end as soon as possible"""
+        return self.parent.Wait(seconds)
+
     def Log(self, level: Union[Level, str], msg: str):
         self.logMethod(level, f"{self.Label}||{msg}")
-        self.LogMessages.append(msg)
+        self.LogMessages.Append(msg)
 
     def SanitizeParams(self):
         for key, value in self.paramRules.items():
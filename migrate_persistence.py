@@ -0,0 +1,15 @@
+"""Copies all the executions stored in the Yaml persistence backend (Persistence folder) to the Sqlite backend.
+Run with the ELCM stopped, then set 'Persistence: Sqlite' in config.yml. The original files are not modified."""
+
+import Helper  # Import before Settings to avoid circular imports
+from Helper import Persistence, YamlBackend, SqliteBackend
+from time import perf_counter
+
+
+if __name__ == '__main__':
+    start = perf_counter()
+    target = SqliteBackend()
+    copied = Persistence.Migrate(YamlBackend(), target)
+    for kind, count in copied.items():
+        print(f"{kind}: {count} items")
+    print(f"Migrated to '{target.path}' in {perf_counter() - start:.1f} seconds")
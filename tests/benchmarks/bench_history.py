@@ -0,0 +1,107 @@
+"""Latency of the execution history (the work done by the '/history' route for a page) with the Yaml and Sqlite
+persistence backends, and time needed to migrate between them.
+Usage: python tests/benchmarks/bench_history.py [<executions>, default 100000] [<folder>, default: temporal folder]"""
+import sys
+from os import makedirs
+from os.path import abspath, dirname, join, exists
+from tempfile import mkdtemp
+from time import perf_counter
+from statistics import median
+
+sys.path.insert(0, abspath(join(dirname(__file__), '..', '..')))
+
+import Helper  # Imported first to avoid cyclic imports between the packages
+from Helper import Serialize, Persistence, YamlBackend, SqliteBackend
+from Experiment import ExecutionDigest
+
+PER_PAGE = 10  # As in the '/history' route
+
+EXECUTION = """Cancelled: false
+Created: Sun Oct 18 07:00:00 2026
+CoarseStatus: Finished
+Id: {id}
+JsonDescriptor:
+  Application: null
+  TestCases:
+  - Smoke
+  UEs: []
+Milestones:
+- PreRun
+- Run
+RemoteId: null
+Verdict: Pass
+"""
+
+STAGE = """Created: Sun Oct 18 07:00:00 2026
+ExecutionId: {id}
+Finished: Sun Oct 18 07:00:01 2026
+GeneratedFiles: []
+HasFinished: true
+HasStarted: true
+Log: Logs/{tag}{id}.log
+Messages:
+- Init
+- Started
+- Finished
+Name: {tag}{id}
+PerCent: 100
+Started: Sun Oct 18 07:00:00 2026
+Status: Finished
+Tag: {tag}
+Verdict: Pass
+"""
+
+
+def generate(executions: int):
+    for kind in ['Execution', 'PreRunner', 'Executor', 'PostRunner']:
+        folder = join(Serialize.BASE, kind)
+        makedirs(folder, exist_ok=True)
+        template = EXECUTION if kind == 'Execution' else STAGE
+        for id in range(executions):
+            with open(join(folder, f'{id}.yml'), 'w', encoding='utf-8') as output:
+                output.write(template.format(id=id, tag=kind))
+
+
+def historyPage(page: int):
+    total = Persistence.Count('Execution')
+    ids = Persistence.Ids('Execution', (page - 1) * PER_PAGE, PER_PAGE)
+    digests = [ExecutionDigest.Get(id) for id in ids]
+    assert len(digests) == PER_PAGE and all(digest is not None for digest in digests) and total > 0
+
+
+def measure(label: str, executions: int, repetitions: int = 5):
+    for page in [1, executions // PER_PAGE // 2, executions // PER_PAGE]:
+        times = []
+        for _ in range(repetitions):
+            ExecutionDigest.cache.clear()  # Cold: digests loaded from the backend
+            start = perf_counter()
+            historyPage(page)
+            times.append(perf_counter() - start)
+        start = perf_counter()
+        historyPage(page)  # Warm: digests cached
+        warm = perf_counter() - start
+        print(f'  {label:6} page {page:6}: {median(times) * 1000:8.1f} ms (cached digests: {warm * 1000:6.1f} ms)')
+
+
+def main(executions: int, folder: str):
+    Serialize.BASE = join(folder, 'Persistence')
+    if not exists(join(Serialize.BASE, 'Execution')):
+        start = perf_counter()
+        generate(executions)
+        print(f'Generated {executions} executions in {perf_counter() - start:.1f} s ({Serialize.BASE})')
+
+    Persistence.backend = YamlBackend()
+    measure('Yaml', executions)
+
+    target = SqliteBackend(join(folder, 'bench.sqlite'))
+    start = perf_counter()
+    copied = Persistence.Migrate(YamlBackend(), target)
+    print(f'Migrated {copied} in {perf_counter() - start:.1f} s')
+
+    Persistence.backend = target
+    measure('Sqlite', executions)
+    assert target.Load('Executor', 7) == YamlBackend().Load('Executor', 7)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000, sys.argv[2] if len(sys.argv) > 2 else mkdtemp())
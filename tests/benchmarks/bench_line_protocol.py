@@ -0,0 +1,47 @@
+"""Compares the previous InfluxDb serialization path (InfluxPayload.Serialized, formatted by the influxdb client) with
+InfluxPayload.LineProtocol. Usage: python tests/benchmarks/bench_line_protocol.py [<points>, default 1000000]"""
+import sys
+from os.path import abspath, dirname, join
+from time import perf_counter
+from datetime import datetime, timezone
+
+sys.path.insert(0, abspath(join(dirname(__file__), '..', '..')))
+
+import Helper  # Imported first to avoid cyclic imports between the packages
+from Helper import InfluxPayload, InfluxPoint
+from influxdb.line_protocol import make_lines
+
+
+def payload(points: int) -> InfluxPayload:
+    res = InfluxPayload('My measurement,x')
+    res.Tags = {'ExecutionId': '12', 'host': 'a b', 'facility': 'f=1', 'empty': ''}
+    for index in range(points):
+        time = (datetime.fromtimestamp(1600000000 + index * 0.001234, tz=timezone.utc) if index % 2
+                else datetime.utcfromtimestamp(1600000000 + index * 0.5))  # Aware and naive timestamps
+        point = InfluxPoint(time)
+        point.Fields = {'i': index, 'f': index * 0.1, 'b': index % 3 == 0, 's': f'q"u\\o\nte {index}',
+                        'n': None, 'k ey': 1.5}
+        res.Points.append(point)
+    return res
+
+
+def main(points: int):
+    data = payload(points)
+
+    start = perf_counter()
+    previous = make_lines({'points': data.Serialized}).encode('utf-8')  # As done by write_points(<dicts>)
+    previousTime = perf_counter() - start
+
+    start = perf_counter()
+    current = ('\n'.join(data.LineProtocol) + '\n').encode('utf-8')  # As done by write_points(<lines>)
+    currentTime = perf_counter() - start
+
+    print(f'{points} points, {len(current)} bytes')
+    print(f'  Serialized + make_lines (previous path): {previousTime:8.2f} s')
+    print(f'  LineProtocol (current path):             {currentTime:8.2f} s ({previousTime / currentTime:.1f}x)')
+    print(f'  Identical output: {previous == current}')
+    return 0 if previous == current else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000))
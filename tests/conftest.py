@@ -0,0 +1,6 @@
+import sys
+from os.path import abspath, dirname
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+import Helper  # Imported first to avoid cyclic imports between the packages
@@ -0,0 +1,50 @@
+from Task import LogCapture
+
+
+def spilled(tmp_path, count: int) -> LogCapture:
+    capture = LogCapture(LogCapture.SPILL, 10, folder=str(tmp_path))
+    for index in range(count):
+        capture.Append(f'Message {index}\nSecond line')
+    return capture
+
+
+def test_spilled_messages_are_kept_in_order(tmp_path):
+    capture = spilled(tmp_path, 5000)
+
+    assert len(capture) == 5000
+    assert list(capture) == [f'Message {index}\nSecond line' for index in range(5000)]
+
+
+def test_interleaved_iterators(tmp_path):
+    capture = spilled(tmp_path, 5000)
+    expected = [f'Message {index}\nSecond line' for index in range(5000)]
+
+    first, second = iter(capture), iter(capture)
+    results = ([], [])
+    for _ in range(len(expected)):
+        results[0].append(next(first))
+        results[1].append(next(second))
+    capture.Append('Appended while reading')  # Not visible to the existing iterators
+
+    assert results[0] == expected and results[1] == expected
+    assert next(first, None) is None and next(second, None) is None
+
+
+def test_close_removes_the_spill_file(tmp_path):
+    capture = spilled(tmp_path, 100)
+    assert len(list(tmp_path.iterdir())) == 1
+
+    capture.Close()
+    assert list(tmp_path.iterdir()) == []
+    assert list(capture) == []
+
+
+def test_ring_and_filter(tmp_path):
+    ring = LogCapture(LogCapture.RING, 3)
+    matching = LogCapture(LogCapture.FILTER, 2, pattern=r'result=\d+')
+    for index in range(10):
+        ring.Append(f'Message {index}')
+        matching.Append(f'result={index}' if index % 2 == 0 else f'Message {index}')
+
+    assert list(ring) == ['Message 7', 'Message 8', 'Message 9']
+    assert list(matching) == ['result=6', 'result=8']
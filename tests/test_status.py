@@ -0,0 +1,88 @@
+from os import chmod, stat
+import threading
+from time import perf_counter
+import pytest
+from Helper import Serialize
+from Status import Status
+
+
+@pytest.fixture
+def persistence(tmp_path, monkeypatch):
+    monkeypatch.setattr(Serialize, 'BASE', str(tmp_path / 'Persistence'))
+    Status.nextId = Status.reservedUntil = 0
+    Status.Initialize()
+    yield tmp_path / 'Persistence'
+
+
+def allocate(threads: int, perThread: int):
+    ids = []
+    lock = threading.Lock()
+
+    def _work():
+        local = [Status.NextId() for _ in range(perThread)]
+        with lock:
+            ids.extend(local)
+
+    workers = [threading.Thread(target=_work) for _ in range(threads)]
+    start = perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return ids, perf_counter() - start
+
+
+def test_concurrent_ids_are_unique(persistence):
+    ids, elapsed = allocate(threads=8, perThread=2500)
+
+    assert len(ids) == 20000
+    assert len(set(ids)) == len(ids)
+    assert sorted(ids) == list(range(20000))
+    assert len(ids) / elapsed > 1000  # Thousands of allocations per second
+
+
+def test_ids_are_not_reused_after_restart(persistence):
+    ids, _ = allocate(threads=4, perThread=250)
+
+    Status.Initialize()  # Simulated restart, ids reserved but not used are skipped
+    assert Status.NextId() > max(ids)
+
+
+def test_persistence_file_is_complete(persistence):
+    allocate(threads=4, perThread=1000)
+
+    data = Serialize.Load(Serialize.Path('persistence'))
+    assert data['NextId'] >= Status.PeekNextId()
+    assert [f.name for f in persistence.iterdir()] == ['persistence.yml']  # No temporary files left
+
+
+def test_concurrent_saves_of_the_same_item(persistence):
+    path = Serialize.Path('item')
+    errors = []
+
+    def _save(value: int):
+        try:
+            for _ in range(200):
+                Serialize.Save({'Value': value, 'Payload': 'x' * 1000}, path)
+        except Exception as e:
+            errors.append(e)
+
+    workers = [threading.Thread(target=_save, args=(value,)) for value in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert errors == []
+    assert Serialize.Load(path)['Value'] in range(4)
+
+
+def test_save_keeps_file_mode(persistence):
+    path = Serialize.Path('Execution', '1')
+    Serialize.Save({'Id': 1}, path)
+    assert stat(path).st_mode & 0o777 == 0o666 & ~Serialize.UMASK
+
+    chmod(path, 0o640)
+    Serialize.Save({'Id': 2}, path)
+    assert stat(path).st_mode & 0o777 == 0o640
+    assert Serialize.Load(path) == {'Id': 2}